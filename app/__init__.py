@@ -1,9 +1,6 @@
 # app/__init__.py (VERSÃO FINAL OTIMIZADA E CORRIGIDA)
 
 from flask import Flask, redirect, url_for, current_app 
-from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
-from flask_login import LoginManager 
 from app.config.config import Config, NAMING_CONVENTION 
 import datetime # Importado aqui para o context_processor
 
@@ -11,18 +8,23 @@ import datetime # Importado aqui para o context_processor
 # 1. INSTANCIAÇÕES GLOBAIS
 # =================================================================
 
-db = SQLAlchemy()
-migrate = Migrate() 
-login_manager = LoginManager() 
-login_manager.login_view = 'auth.login' 
-login_manager.login_message = 'Por favor, faça login para acessar esta página.' 
-login_manager.login_message_category = 'warning'
+# Instâncias únicas (os modelos usam 'from app import db')
+from app.extensions.database import db  # Leituras de GET podem ir para a réplica
+from app.extensions.login_manager import login_manager
 
 # =================================================================
 # 2. FUNÇÃO CREATE_APP
 # =================================================================
 
 def create_app(config_class=Config):
+    """
+    Factory única da aplicação (run.py, CLI e benchmarks). Dependências
+    pesadas usadas só pela CLI ou pela API assíncrona (Alembic, driver
+    async) são carregadas sob demanda, fora da partida dos workers.
+    """
+    from app.extensions.migrate import init_migrate
+    from app.extensions.startup import init_jinja_cache
+
     app = Flask(__name__)
     app.config.from_object(config_class)
     
@@ -31,38 +33,91 @@ def create_app(config_class=Config):
     # -------------------------------------------------------------
     db.init_app(app)
     db.metadata.naming_convention = NAMING_CONVENTION 
-    migrate.init_app(app, db, render_as_batch=True)
+    init_migrate(app, db)  # Alembic só é carregado pela CLI do Flask
     login_manager.init_app(app)
+    init_jinja_cache(app)
     
     # -------------------------------------------------------------
     # 2.2. CARREGAMENTO DE MODELOS E CONFIGURAÇÃO DO FLASK-LOGIN
     # -------------------------------------------------------------
     # Garante que os modelos sejam carregados antes de qualquer uso relacionado a DB
     with app.app_context():
-        # Importa todos os módulos de modelos para registro no SQLAlchemy/Migrate
-        # e garante que o objeto User esteja acessível no load_user.
+        # Importa todos os módulos de modelos para registro no SQLAlchemy/Migrate.
         try:
             # Importação Mestra:
-            from app.models import user, service, booking, schedule
+            from app.models import user, service, booking, schedule, occupancy, counter, utilization
             
-            # Importação Específica de User e CLI para uso local
-            from app.models.user import User, register_cli_commands
+            # Comandos CLI e serviços usados localmente
+            from app.models.user import register_cli_commands
+            from app.services.availability_engine import register_cli_commands as register_availability_cli
+            from app.services.occupancy_service import register_cli_commands as register_occupancy_cli
+            from app.services.booking_service import register_cli_commands as register_booking_cli
+            from app.services.counter_service import register_cli_commands as register_counter_cli
+            from app.services.utilization_service import register_cli_commands as register_utilization_cli
+            from app.services.availability_cache import availability_cache
+            from app.services.schedule_template import schedule_template
+            from app.services.user_cache import user_cache
+            from app.services.password_hasher import password_hasher, register_cli_commands as register_password_cli
+            from app.extensions.engine import init_engine, register_cli_commands as register_engine_cli
+            from app.extensions.replica import init_replica, register_cli_commands as register_replica_cli
+            from app.extensions.async_db import async_db
+            from app.extensions.startup import register_cli_commands as register_startup_cli
+            from app.extensions.sql_profiler import sql_profiler
+            from app.extensions.metrics import metrics, register_cli_commands as register_metrics_cli
+            from app.services.backfill import run_backfills
+            from app.services.async_booking_service import register_cli_commands as register_async_api_cli
             
         except ImportError as e:
             app.logger.error(f"Erro ao carregar modelos: {e}")
             return app # Retorna o app se a falha de importação for crítica
             
         # 🚨 CONFIGURAÇÃO DO FLASK-LOGIN (LOADER) 🚨
-        # Definido DENTRO do contexto de create_app, mas AGORA a classe User é conhecida
+        # Definido DENTRO do contexto de create_app; o usuário vem do user_cache
         @login_manager.user_loader
         def load_user(user_id):
-            # A classe User está acessível aqui devido à importação acima.
-            # return db.session.get(User, int(user_id)) # Método mais moderno do SQLAlchemy 2.0
-            return User.query.get(int(user_id)) 
+            # Dados de identidade vêm do cache (invalidado nas rotas que editam o usuário)
+            return user_cache.load(user_id)
 
         # REGISTRO DE COMANDOS CLI
         if 'register_cli_commands' in locals():
              register_cli_commands(app)
+             register_availability_cli(app)
+             register_occupancy_cli(app)
+             register_booking_cli(app)
+             register_counter_cli(app)
+             register_utilization_cli(app)
+             register_password_cli(app)
+             register_engine_cli(app)
+             register_replica_cli(app)
+             register_async_api_cli(app)
+             register_startup_cli(app)
+             register_metrics_cli(app)
+
+        # Cache de disponibilidade e modelo semanal (tamanho/TTL vindos do Config)
+        availability_cache.init_app(app)
+        schedule_template.init_app(app)
+        user_cache.init_app(app)
+        password_hasher.init_app(app)
+
+        # PRAGMAs de conexão SQLite do perfil ativo (ProductionConfig)
+        init_engine(app, db)
+
+        # Roteamento de leituras para a réplica (se REPLICA_DATABASE_URL estiver definido)
+        init_replica(app, db)
+
+        # Engine assíncrono (aiosqlite/asyncpg) usado pelas views async do blueprint 'api'
+        async_db.init_app(app, db)
+
+        # Consultas/tempo de banco por request (Server-Timing e /admin/debug/sql)
+        sql_profiler.init_app(app)
+
+        # Métricas do processo (Prometheus em /admin/metrics)
+        metrics.init_app(app)
+        metrics.register_cache('availability', availability_cache.stats)
+        metrics.register_cache('user', user_cache.stats)
+
+        # Tabelas derivadas vazias em banco já populado (primeira partida após a migração)
+        run_backfills(app)
 
 
     # -------------------------------------------------------------
@@ -73,10 +128,12 @@ def create_app(config_class=Config):
     from app.blueprints.auth.routes import auth_bp
     from app.blueprints.client.routes import client_bp
     from app.blueprints.admin.routes import admin_bp
+    from app.blueprints.api.routes import api_bp
 
     app.register_blueprint(auth_bp, url_prefix='/auth')
     app.register_blueprint(client_bp, url_prefix='/client') 
     app.register_blueprint(admin_bp, url_prefix='/admin')
+    app.register_blueprint(api_bp, url_prefix='/api')
     
     # -------------------------------------------------------------
     # 2.4. ROTAS RAIZ E PROCESSADORES DE CONTEXTO
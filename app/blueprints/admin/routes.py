@@ -1,16 +1,26 @@
 # app/blueprints/admin/routes.py (Continuação)
 
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, Response, stream_with_context
 from app.utils.decorators import admin_required 
-from flask_login import login_required
+from flask_login import login_required, current_user
 from app.models.user import User
 from app.models.service import Service 
 from app.models.booking import Booking
 from app.models.schedule import Schedule 
+from app.models.occupancy import MINUTES_PER_DAY
 from flask_login import login_required # Importa o decorator padrão do Flask-Login
 from app.utils.decorators import admin_required # Importa apenas o seu decorator customizado
-from datetime import datetime
+from datetime import datetime, timedelta
 from app import db
+from app.services.availability_cache import availability_cache
+from app.services.schedule_template import schedule_template
+from app.services.availability_service import AvailabilityService
+from app.services import counter_service, utilization_service
+from app.services.booking_service import BookingService, EXPORT_FORMATS, export_rows
+from app.services.user_service import UserService, normalize_email
+from app.services.user_cache import user_cache
+from app.extensions.sql_profiler import sql_profiler
+from app.extensions.metrics import metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
 
 
 
@@ -29,16 +39,120 @@ def dashboard():
     """RF08 - Dashboard Administrativo: Exibe informações de resumo."""
     
     # 1. Obter dados de resumo para o Dashboard (RF08)
-    total_services = Service.query.count()
-    total_users = User.query.count()
-    # Adicione uma lógica de contagem de agendamentos se desejar
-    total_bookings = Booking.query.count() 
+    # Contadores mantidos incrementalmente: uma única consulta, sem COUNT(*)
+    counters = counter_service.get_counters(['servico', 'usuario', 'agendamento', 'schedule'])
+    total_services = counters['servico']
+    total_users = counters['usuario']
+    total_bookings = counters['agendamento']  # Não inclui agendamentos excluídos
     
     # 2. Renderizar o template
     return render_template('admin/dashboard.html',
                            total_services=total_services,
                            total_users=total_users,
-                           total_bookings=total_bookings)
+                           total_bookings=total_bookings,
+                           total_schedules=counters['schedule'])
+
+
+@admin_bp.route('/cache/availability')
+@login_required
+@admin_required
+def availability_cache_stats():
+    """Contadores do cache de disponibilidade (hits/misses/evictions)."""
+    return jsonify(availability_cache.stats())
+
+
+@admin_bp.route('/reports/capacity')
+@login_required
+@admin_required
+def capacity_report():
+    """
+    RF08 - Capacidade do mês: minutos de agenda/ocupados/livres e slots
+    livres por serviço. Parâmetros: month=YYYY-MM (padrão: próximo mês),
+    slot_minutes (opcional) e service_id (repetível).
+    """
+    month_str = request.args.get('month')
+    try:
+        if month_str:
+            reference = datetime.strptime(month_str, '%Y-%m')
+        else:
+            today = datetime.now()
+            reference = datetime(today.year + today.month // 12, today.month % 12 + 1, 1)
+    except ValueError:
+        return jsonify({'error': 'Use month=YYYY-MM.'}), 400
+
+    slot_minutes = request.args.get('slot_minutes') or None
+    if slot_minutes is not None:
+        try:
+            slot_minutes = int(slot_minutes)
+        except ValueError:
+            slot_minutes = 0
+        if not 1 <= slot_minutes <= MINUTES_PER_DAY:
+            return jsonify({'error': f'slot_minutes deve estar entre 1 e {MINUTES_PER_DAY}.'}), 400
+
+    return jsonify(AvailabilityService.month_capacity(
+        reference.year,
+        reference.month,
+        service_ids=request.args.getlist('service_id', type=int),
+        slot_minutes=slot_minutes
+    ))
+
+
+@admin_bp.route('/reports/utilization')
+@login_required
+@admin_required
+def utilization_report():
+    """
+    RF08 - Utilização por serviço, dia da semana e hora: minutos agendados
+    x minutos de agenda. Parâmetros: start/end=YYYY-MM-DD (padrão: últimos
+    30 dias) e service_id (repetível).
+    """
+    try:
+        end = datetime.strptime(request.args['end'], '%Y-%m-%d').date() \
+            if request.args.get('end') else datetime.now().date()
+        start = datetime.strptime(request.args['start'], '%Y-%m-%d').date() \
+            if request.args.get('start') else end - timedelta(days=29)
+    except ValueError:
+        return jsonify({'error': 'Use start/end=YYYY-MM-DD.'}), 400
+    if start > end:
+        return jsonify({'error': 'start deve ser anterior a end.'}), 400
+
+    return jsonify(utilization_service.utilization_report(
+        start, end, service_ids=request.args.getlist('service_id', type=int)
+    ))
+
+
+@admin_bp.route('/debug/sql')
+@login_required
+@admin_required
+def sql_debug():
+    """
+    Diagnóstico de SQL dos últimos requests: quantidade de consultas,
+    tempo no banco e consultas repetidas (suspeitas de N+1).
+    """
+    if request.args.get('clear'):
+        sql_profiler.clear()
+        return redirect(url_for('admin.sql_debug'))
+
+    return render_template('admin/sql_debug.html',
+                           requests=sql_profiler.recent(),
+                           threshold=sql_profiler.threshold,
+                           enabled=sql_profiler.enabled)
+
+
+@admin_bp.route('/metrics')
+def metrics_endpoint():
+    """
+    Métricas do processo no formato texto do Prometheus (latência e vazão
+    por endpoint, tempo de SQL, caches, agendamentos criados/cancelados).
+    Acesso: administrador logado ou 'Authorization: Bearer <METRICS_TOKEN>'.
+    """
+    if not metrics.check_token(request.headers.get('Authorization')):
+        if not current_user.is_authenticated or current_user.perfil != 'Administrador':
+            return Response('Acesso não autorizado.\n', status=403, mimetype='text/plain')
+
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
+
 # ROTAS DE SERVIÇOS (CRUD - RF03)
 # -------------------------------------------------------------
 
@@ -198,6 +312,7 @@ def new_schedule():
             hora_fim=hora_fim
         )
         new_schedule.save()
+        schedule_template.invalidate()
         flash(f'Horário de {hora_inicio} às {hora_fim} em {dias_semana_map.get(dia_semana)} criado com sucesso!', 'success')
         return redirect(url_for('admin.manage_schedules'))
 
@@ -214,33 +329,115 @@ def new_schedule():
 
 # ... imports dos modelos Booking e User aqui ...
 
+# Paginação da lista de agendamentos
+BOOKINGS_PER_PAGE = 50
+FILTER_ARGS = ('status', 'service_id', 'user_id', 'date_from', 'date_to', 'include_deleted', 'per_page')
+
+# Paginação da lista de usuários
+USERS_PER_PAGE = 50
+
+def _booking_filters(source):
+    """Filtros da lista de agendamentos a partir de args/form/JSON (ValueError se inválidos)."""
+    filters = {'status': source.get('status') or None}
+    for key in ('service_id', 'user_id'):
+        value = source.get(key)
+        filters[key] = int(value) if value not in (None, '') else None
+    for key in ('date_from', 'date_to'):
+        value = source.get(key)
+        filters[key] = datetime.strptime(value, '%Y-%m-%d').date() if value else None
+    filters['include_deleted'] = str(source.get('include_deleted', '')).lower() in ('1', 'true', 'on')
+    return filters
+
 @admin_bp.route('/bookings')
 @login_required
 @admin_required
 def manage_bookings():
-    # 🚨 CORREÇÃO: Descomente e execute a query:
-    agendamentos = Booking.query.order_by(Booking.data_agendamento.desc()).all() 
-    
-    # 2. Renderize o template
+    """
+    Lista de agendamentos com filtros no servidor e paginação por cursor
+    (parâmetro 'after'); serviço, cliente e bloco são carregados no mesmo SELECT.
+    """
+    try:
+        filters = _booking_filters(request.args)
+        per_page = min(request.args.get('per_page', BOOKINGS_PER_PAGE, type=int), 200)
+        agendamentos, next_cursor = BookingService.list_bookings(
+            after=request.args.get('after'), limit=max(per_page, 1), **filters
+        )
+    except ValueError:
+        flash('Filtro ou página inválidos.', 'warning')
+        return redirect(url_for('admin.manage_bookings'))
+
+    # Filtros atuais (para manter nos links de paginação)
+    query_args = {k: request.args.get(k) for k in FILTER_ARGS if request.args.get(k)}
+
     return render_template('admin/manage_bookings.html', 
                            agendamentos=agendamentos, 
+                           services=Service.query.order_by(Service.nome).all(),
+                           filters=query_args,
+                           next_cursor=next_cursor,
+                           is_first_page=not request.args.get('after'),
                            active_page='admin.manage_bookings')
 
+@admin_bp.route('/bookings/export')
+@login_required
+@admin_required
+def export_bookings():
+    """
+    Exporta agendamentos (com serviço e cliente) em streaming:
+    format=csv|ndjson e os mesmos filtros da listagem.
+    """
+    fmt = request.args.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': 'Formato inválido (use csv ou ndjson).'}), 400
+
+    try:
+        filters = _booking_filters(request.args)
+    except ValueError:
+        return jsonify({'error': 'Datas no formato YYYY-MM-DD.'}), 400
+
+    serializer, mimetype = EXPORT_FORMATS[fmt]
+    filename = f"agendamentos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{fmt}"
+    return Response(
+        stream_with_context(serializer(export_rows(**filters))),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
 # ...
 
 @admin_bp.route('/users')
 @login_required
 @admin_required
 def manage_users():
-    # 🚨 CORREÇÃO: Descomente e execute a query:
-    users = User.query.order_by(User.nome).all() 
+    """Lista paginada (keyset por nome) com busca por prefixo de nome/e-mail."""
+    search = request.args.get('q', '').strip()
+    users, next_after = UserService.list_users(
+        after=request.args.get('after', type=int),
+        limit=USERS_PER_PAGE,
+        prefix=search
+    )
     
     # 2. Renderize o template
     return render_template('admin/manage_users.html', 
                            users=users, 
+                           search=search,
+                           next_after=next_after,
+                           is_first_page=not request.args.get('after'),
                            active_page='admin.manage_users')
 
 
+@admin_bp.route('/users/search')
+@login_required
+@admin_required
+def search_users():
+    """Typeahead: JSON com usuários cujo nome ou e-mail começa com 'q'."""
+    limit = min(request.args.get('limit', 10, type=int), 50)
+    results = UserService.search(request.args.get('q', ''), limit=max(limit, 1))
+    return jsonify({'users': [
+        {'id': u.id, 'nome': u.nome, 'email': u.email, 'perfil': u.perfil}
+        for u in results
+    ]})
+
+
 # app/blueprints/admin/routes.py
 
 # ... imports ...
@@ -293,7 +490,7 @@ def edit_user(user_id):
         if nome and email:
             # 3. Validação de Email Duplicado (exceto para o usuário atual)
             existing_email = User.query.filter(
-                User.email == email,
+                db.func.lower(User.email) == normalize_email(email),
                 User.id != user_id
             ).first()
             
@@ -318,6 +515,7 @@ def edit_user(user_id):
             
             # 5. Salvar (Assumindo que user.save() ou db.session.commit() é chamado)
             user.save() 
+            user_cache.invalidate(user.id)
             
             flash(f'Usuário "{nome}" atualizado com sucesso!', 'success')
             return redirect(url_for('admin.manage_users'))
@@ -348,6 +546,7 @@ def delete_user(user_id):
     # 3. Excluir o usuário do banco de dados (Assumindo que user.delete() executa o commit)
     try:
         user.delete() 
+        user_cache.invalidate(user_id)
         flash(f'Usuário "{nome_usuario}" excluído permanentemente.', 'success')
     except Exception as e:
         # Lidar com erros de integridade (ex: chaves estrangeiras, se o DB impedir)
@@ -399,6 +598,71 @@ def cancel_booking(booking_id):
     return redirect(url_for('admin.manage_bookings'))
 
 
+@admin_bp.route('/bookings/status', methods=['POST'])
+@login_required
+@admin_required
+def bulk_booking_status():
+    """
+    Confirma ou cancela agendamentos em lote. Formulário (ids selecionados)
+    ou JSON: {"action": "confirm"|"cancel", "ids": [...]} ou
+    {"action": ..., "filters": {"status": ..., "date_from": ..., ...}}.
+    No JSON, responde com o resultado de cada agendamento.
+    """
+    if request.is_json:
+        payload = request.get_json(silent=True) or {}
+        action, ids = payload.get('action'), payload.get('ids')
+        filter_source = payload.get('filters') or {}
+    else:
+        action = request.form.get('action')
+        ids = request.form.getlist('ids', type=int) or None
+        filter_source = {}
+
+    try:
+        filters = _booking_filters(filter_source)
+        if ids is not None:
+            ids = [int(booking_id) for booking_id in ids]
+        results = BookingService.bulk_update_status(action, ids=ids, **filters)
+    except (TypeError, ValueError) as e:
+        if request.is_json:
+            return jsonify({'error': str(e)}), 400
+        flash(str(e) if action in ('confirm', 'cancel') else 'Ação inválida.', 'warning')
+        return redirect(url_for('admin.manage_bookings'))
+
+    updated = sum(1 for item in results.values() if item['outcome'] == 'updated')
+    if request.is_json:
+        return jsonify({
+            'action': action,
+            'updated': updated,
+            'results': {str(booking_id): item for booking_id, item in results.items()}
+        })
+
+    flash(f'{updated} de {len(results)} agendamento(s) atualizado(s).', 'success' if updated else 'info')
+    return redirect(url_for('admin.manage_bookings'))
+
+
+@admin_bp.route('/bookings/delete', methods=['POST'])
+@login_required
+@admin_required
+def delete_selected_bookings():
+    """Exclusão lógica (soft delete) dos agendamentos selecionados, em uma transação."""
+    ids = request.form.getlist('ids', type=int)
+    if not ids:
+        flash('Nenhum agendamento selecionado.', 'info')
+        return redirect(url_for('admin.manage_bookings'))
+
+    try:
+        deleted = Booking.soft_delete_by_ids(
+            ids,
+            deleted_by=current_user.id,
+            deleted_reason='Exclusão em lote pelo administrador'
+        )
+        flash(f'{len(deleted)} agendamento(s) excluído(s).', 'warning')
+    except Exception as e:
+        flash(f'Erro ao excluir agendamentos: {str(e)}', 'danger')
+
+    return redirect(url_for('admin.manage_bookings'))
+
+
 # app/blueprints/admin/routes.py (ADICIONE ESTA ROTA)
 
 @admin_bp.route('/schedules/edit/<int:schedule_id>', methods=['GET', 'POST'])
@@ -436,6 +700,7 @@ def edit_schedule(schedule_id):
         schedule.hora_inicio = hora_inicio
         schedule.hora_fim = hora_fim
         schedule.save()
+        schedule_template.invalidate()
         
         flash(f'Horário de {hora_inicio} às {hora_fim} em {dias_semana_map.get(dia_semana)} atualizado com sucesso!', 'success')
         return redirect(url_for('admin.manage_schedules')) # Usa 'admin'
@@ -465,6 +730,7 @@ def delete_schedule(schedule_id):
     try:
         db.session.delete(schedule)
         db.session.commit()
+        schedule_template.invalidate()
         flash('✅ Bloco de horário excluído com sucesso.', 'success')
     except Exception:
         db.session.rollback()
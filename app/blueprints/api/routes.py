@@ -0,0 +1,73 @@
+# app/blueprints/api/routes.py
+
+from datetime import datetime
+
+from flask import Blueprint, request, jsonify
+from flask_login import login_required, current_user
+
+from app.extensions.async_db import async_db
+from app.services import async_booking_service
+from app.services.booking_service import BookingConflictError, InvalidSlotError
+
+
+api_bp = Blueprint('api', __name__)
+
+# =============================================================
+# API ASSÍNCRONA (JSON) - mesmas respostas das rotas do cliente
+# =============================================================
+
+@api_bp.route('/available_slots', methods=['GET'])
+@login_required
+async def available_slots():
+    """RF05 - Slots livres do dia (mesmo formato de client.available_slots)."""
+    date_str = request.args.get('date')
+    service_id = request.args.get('service_id', type=int)
+
+    if not date_str or not service_id:
+        return jsonify({'slots': []})
+
+    try:
+        selected_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'slots': []})
+
+    async with async_db.session() as session:
+        slots = await async_booking_service.get_available_slots(session, service_id, selected_date)
+
+    return jsonify({'slots': slots or []})
+
+
+@api_bp.route('/bookings', methods=['POST'])
+@login_required
+async def create_booking():
+    """
+    RF05, RF06 - Cria um agendamento 'Pendente'.
+    JSON: {"service_id": 1, "datetime_slot": "YYYY-MM-DD HH:MM"}
+    """
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({'error': 'Corpo JSON deve ser um objeto.'}), 400
+    service_id = payload.get('service_id')
+
+    try:
+        slot_datetime = datetime.strptime(payload['datetime_slot'], '%Y-%m-%d %H:%M')
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'error': 'Formato de data/hora inválido.'}), 400
+
+    user_id = current_user.id
+    try:
+        async with async_db.session() as session:
+            booking = await async_booking_service.create_booking(
+                session, user_id, service_id, slot_datetime
+            )
+    except InvalidSlotError as e:
+        return jsonify({'error': str(e)}), 400
+    except BookingConflictError as e:
+        return jsonify({'error': str(e)}), 409
+
+    return jsonify({
+        'id': booking.id,
+        'service_id': booking.service_id,
+        'datetime_slot': booking.data_agendamento.strftime('%Y-%m-%d %H:%M'),
+        'status': booking.status
+    }), 201
@@ -1,6 +1,9 @@
 from flask import Blueprint, render_template, request, flash, redirect, url_for, current_app
 from flask_login import login_user, logout_user, login_required, current_user 
 from app.models.user import User
+from app.services.password_hasher import PasswordHasherBusy
+from app.services.user_service import UserService
+from app.services.user_cache import user_cache
 from app import db # Importa a instância do SQLAlchemy (ou sua variável db)
 
 # -------------------------------------------------------------
@@ -10,6 +13,9 @@ from app import db # Importa a instância do SQLAlchemy (ou sua variável db)
 # no app/__init__.py ao registrar.
 auth_bp = Blueprint('auth', __name__) 
 
+# Pool de hash de senhas saturado (PasswordHasherBusy): erro temporário
+HASHER_BUSY_MESSAGE = 'Servidor ocupado no momento. Tente novamente em alguns segundos.'
+
 # =============================================================
 # 1. ROTAS DE AUTENTICAÇÃO PRINCIPAIS
 # =============================================================
@@ -32,13 +38,29 @@ def login():
         senha = request.form.get('senha')
 
         try:
-            user = db.session.query(User).filter_by(email=email).first()
+            user = UserService.find_by_email(email)
         except Exception as e:
             current_app.logger.error(f"Erro no login: {e}")
             flash('Erro interno ao acessar o banco de dados. Tente novamente.', 'danger')
             return render_template('auth/login.html')
 
-        if user and user.check_password(senha):
+        try:
+            valid = bool(user) and user.check_password(senha)
+            # Atualiza hashes gerados com parâmetros antigos (transparente ao usuário)
+            rehashed = valid and user.rehash_password(senha)
+        except PasswordHasherBusy as e:
+            current_app.logger.warning(f"Login adiado: {e}")
+            flash(HASHER_BUSY_MESSAGE, 'warning')
+            return render_template('auth/login.html', title='Login'), 503
+
+        if valid:
+            if rehashed:
+                try:
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    current_app.logger.error(f"Erro ao atualizar hash de senha: {e}")
+
             login_user(user)
             flash(f'Bem-vindo(a), {user.nome.split()[0]}!', 'success')
 
@@ -75,7 +97,7 @@ def register():
             return render_template('auth/register.html', nome=nome, email=email) # Mantém os dados preenchidos
 
         # 1. Validação de Email existente
-        if User.query.filter_by(email=email).first():
+        if UserService.find_by_email(email):
             flash('Este email já está cadastrado.', 'warning')
             return render_template('auth/register.html', nome=nome)
 
@@ -85,7 +107,12 @@ def register():
             email=email,
             perfil='Cliente' 
         )
-        new_user.set_password(senha)
+        try:
+            new_user.set_password(senha)
+        except PasswordHasherBusy as e:
+            current_app.logger.warning(f"Cadastro adiado: {e}")
+            flash(HASHER_BUSY_MESSAGE, 'warning')
+            return render_template('auth/register.html', nome=nome, email=email), 503
         
         # 3. Salvamento no DB
         try:
@@ -135,7 +162,14 @@ def change_password():
         new_password = request.form.get('new_password')
         confirm_password = request.form.get('confirm_password')
 
-        if not current_user.check_password(current_password):
+        try:
+            current_ok = current_user.check_password(current_password)
+        except PasswordHasherBusy as e:
+            current_app.logger.warning(f"Troca de senha adiada: {e}")
+            flash(HASHER_BUSY_MESSAGE, 'warning')
+            return render_template('auth/change_password.html', title='Alterar Senha'), 503
+
+        if not current_ok:
             flash('A Senha Atual informada está incorreta.', 'danger')
         elif new_password != confirm_password:
             flash('A Nova Senha e a Confirmação de Senha não coincidem.', 'danger')
@@ -150,10 +184,16 @@ def change_password():
                 else:
                     db.session.add(current_user)
                     db.session.commit()
+                user_cache.invalidate(current_user.id)
                     
                 flash('Senha alterada com sucesso!', 'success')
                 # Redireciona de volta para o perfil
                 return redirect(url_for('client.my_profile'))
+
+            except PasswordHasherBusy as e:
+                current_app.logger.warning(f"Troca de senha adiada: {e}")
+                flash(HASHER_BUSY_MESSAGE, 'warning')
+                return render_template('auth/change_password.html', title='Alterar Senha'), 503
                 
             except Exception as e:
                 db.session.rollback()
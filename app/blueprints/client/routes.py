@@ -6,9 +6,12 @@ from flask_login import login_required, current_user
 from app import db 
 from app.models.service import Service
 from app.models.booking import Booking
-from app.models.schedule import Schedule
 from app.models.user import User # 🚨 Necessário para buscar outros perfis/dados
-from app.services.booking_service import BookingService 
+from app.services.booking_service import BookingService, BookingConflictError, BookingBatchError, InvalidSlotError
+from app.services import availability_engine, occupancy_service
+from app.services.availability_cache import availability_cache
+from app.services.schedule_template import schedule_template
+from app.services.user_cache import user_cache
 from datetime import datetime, time, timedelta 
 from sqlalchemy.orm import joinedload 
 
@@ -60,61 +63,81 @@ def available_slots():
     except ValueError:
         return jsonify({'slots': []})
 
+    # 0. Resposta em cache para (data, serviço)?
+    cached = availability_cache.get(selected_date, service_id)
+    if cached is not None:
+        return jsonify({'slots': cached})
+
     service = Service.query.get(service_id)
     if not service:
         return jsonify({'slots': []})
 
-    service_duration = service.duracao
-
-    # 1. Encontrar os blocos de trabalho (Schedule) para o dia
-    schedules = Schedule.query.filter_by(dia_semana=day_of_week).all()
+    # 1. Blocos de trabalho do dia (modelo semanal compilado, sem SQL)
+    windows = schedule_template.windows(day_of_week)
 
-    # 2. Obter agendamentos existentes (Confirmado/Pendente) para a data
-    booked_slots = Booking.query.options(joinedload(Booking.servico)).filter(
-        db.func.date(Booking.data_agendamento) == date_str,
-        Booking.status.in_(['Confirmado', 'Pendente'])
-    ).all()
-    
-    # Mapeia os horários ocupados
-    unavailable_intervals = []
-    for booked in booked_slots:
-        booked_start = booked.data_agendamento
-        booked_duration = booked.servico.duracao
-        booked_end = booked_start + timedelta(minutes=booked_duration)
-        unavailable_intervals.append((booked_start, booked_end))
-    
-    available_slots_data = []
+    # 2. Bitmap de ocupação materializado do dia (Confirmado/Pendente)
+    mask = occupancy_service.get_day_mask(selected_date)
 
-    # 3. Gerar slots e checar a disponibilidade
-    for schedule in schedules:
-        current_time = datetime.combine(selected_date, datetime.strptime(schedule.hora_inicio, '%H:%M').time())
-        schedule_end_time = datetime.combine(selected_date, datetime.strptime(schedule.hora_fim, '%H:%M').time())
-        
-        while current_time < schedule_end_time:
-            slot_start = current_time
-            slot_end = slot_start + timedelta(minutes=service_duration)
-            
-            if slot_end > schedule_end_time:
-                break
-
-            is_available = True
-            
-            for booked_start, booked_end in unavailable_intervals:
-                if (slot_start < booked_end and slot_end > booked_start):
-                    is_available = False
-                    break
-            
-            available_slots_data.append({
-                'time': slot_start.strftime('%H:%M'),
-                'datetime_slot': slot_start.strftime('%Y-%m-%d %H:%M'),
-                'status': 'available' if is_available else 'unavailable' 
-            })
-
-            current_time += timedelta(minutes=service_duration)
+    # 3. Gerar slots e checar a disponibilidade (operações de bits)
+    available_slots_data = availability_engine.build_slots_from_mask(
+        selected_date,
+        windows,
+        mask,
+        service.duracao
+    )
+    availability_cache.set(selected_date, service_id, available_slots_data)
 
     return jsonify({'slots': available_slots_data})
 
 
+# Limite de dias por consulta na API de faixa (um mês e pouco)
+MAX_RANGE_DAYS = 62
+
+
+@client_bp.route('/api/available_slots/range', methods=['GET'])
+@login_required
+def available_slots_range():
+    """
+    RF05 - Slots de vários dias em uma única chamada.
+    Aceita 'start' + 'end' (YYYY-MM-DD, inclusivo) ou 'start' + 'days'.
+    """
+    start_str = request.args.get('start')
+    end_str = request.args.get('end')
+    days = request.args.get('days', type=int)
+    service_id = request.args.get('service_id', type=int)
+
+    if not start_str or not service_id:
+        return jsonify({'days': {}})
+
+    try:
+        start_date = datetime.strptime(start_str, '%Y-%m-%d').date()
+        if end_str:
+            end_date = datetime.strptime(end_str, '%Y-%m-%d').date()
+        else:
+            end_date = start_date + timedelta(days=(days or 1) - 1)
+    except ValueError:
+        return jsonify({'days': {}})
+
+    if end_date < start_date:
+        return jsonify({'days': {}})
+
+    if (end_date - start_date).days >= MAX_RANGE_DAYS:
+        return jsonify({'error': f'Intervalo máximo de {MAX_RANGE_DAYS} dias.'}), 400
+
+    service = Service.query.get(service_id)
+    if not service:
+        return jsonify({'days': {}})
+
+    # Bitmaps de ocupação da faixa inteira em uma única consulta
+    masks = occupancy_service.get_masks(start_date, end_date)
+
+    return jsonify({
+        'days': availability_engine.build_slots_range(
+            start_date, end_date, schedule_template.windows_by_weekday(), masks, service.duracao
+        )
+    })
+
+
 # =============================================================
 # RF05 - ROTA DE FINALIZAÇÃO DE AGENDAMENTO (sem mudanças)
 # =============================================================
@@ -136,63 +159,82 @@ def finalize_booking():
         flash('Erro no formato da data/hora selecionada.', 'danger')
         return redirect(url_for('client.index'))
 
-    # --- Buscar o serviço ---
-    service = Service.query.get(service_id)
-    if not service:
-        flash('Serviço não encontrado.', 'danger')
+    # --- Criar o agendamento (reserva atômica no BookingService) ---
+    try:
+        new_booking = BookingService.create_booking(current_user.id, service_id, datetime_slot)
+    except InvalidSlotError as e:
+        flash(f'Erro de agendamento: {e}', 'danger')
         return redirect(url_for('client.index'))
-
-    slot_start = datetime_slot
-    slot_end = slot_start + timedelta(minutes=service.duracao)
-    booking_date_str = datetime_slot.strftime('%Y-%m-%d')
-
-    # --- Buscar agendamentos existentes (Confirmado/Pendente, não deletados) ---
-    booked_slots = Booking.query.options(joinedload(Booking.servico)).filter(
-        db.func.date(Booking.data_agendamento) == booking_date_str,
-        Booking.status.in_(['Confirmado', 'Pendente']),
-        Booking.deleted_at.is_(None)
-    ).all()
-
-    # --- Checagem de conflito de horário ---
-    for booked in booked_slots:
-        booked_start = booked.data_agendamento
-        booked_end_existing = booked_start + timedelta(minutes=booked.servico.duracao)
-        if slot_start < booked_end_existing and slot_end > booked_start:
-            flash('Este horário já está ocupado. Por favor, escolha outro slot.', 'danger')
-            return redirect(url_for('client.new_booking', service_id=service_id))
-
-    # --- Encontrar Schedule correspondente ---
-    day_of_week = datetime_slot.weekday()
-    slot_time_str = datetime_slot.strftime('%H:%M')
-
-    schedule = Schedule.query.filter(
-        Schedule.dia_semana == day_of_week,
-        Schedule.hora_inicio <= slot_time_str,
-        Schedule.hora_fim > slot_time_str
-    ).first()
-
-    if not schedule:
-        flash('Erro de agendamento: O horário selecionado não corresponde a um bloco de trabalho válido.', 'danger')
+    except BookingConflictError:
+        flash('Este horário já está ocupado. Por favor, escolha outro slot.', 'danger')
         return redirect(url_for('client.new_booking', service_id=service_id))
-
-    # --- Criar e salvar o agendamento ---
-    new_booking = Booking(
-        user_id=current_user.id,
-        service_id=service_id,
-        data_agendamento=datetime_slot,
-        status='Pendente',
-        schedule_id=schedule.id
-    )
-
-    try:
-        new_booking.save()
-        flash(f'Agendamento de {new_booking.servico.nome} em {datetime_slot.strftime("%d/%m/%Y às %H:%M")} criado com sucesso!', 'success')
-        return redirect(url_for('client.my_bookings'))
     except Exception as e:
         db.session.rollback()
         flash(f'Falha ao criar agendamento. Tente novamente. Erro: {str(e)}', 'danger')
         return redirect(url_for('client.new_booking', service_id=service_id))
 
+    flash(f'Agendamento de {new_booking.servico.nome} em {datetime_slot.strftime("%d/%m/%Y às %H:%M")} criado com sucesso!', 'success')
+    return redirect(url_for('client.my_bookings'))
+
+
+@client_bp.route('/api/bookings/batch', methods=['POST'])
+@login_required
+def batch_booking():
+    """
+    RF05 - Agenda vários horários de uma vez (tudo ou nada).
+    JSON: {"service_id": 1, "slots": ["YYYY-MM-DD HH:MM", ...]}
+      ou  {"service_id": 1, "start": "YYYY-MM-DD HH:MM", "weeks": 4}
+    """
+    payload = request.get_json(silent=True)
+    if payload is None:
+        payload = {}
+    if not isinstance(payload, dict):
+        return jsonify({'error': 'Corpo JSON deve ser um objeto.'}), 400
+    service_id = payload.get('service_id')
+
+    if payload.get('start'):
+        # Valida 'weeks' antes de gerar a série: o tamanho do lote vem daqui
+        weeks = payload.get('weeks', 1)
+        if isinstance(weeks, bool) or not isinstance(weeks, (int, str)):
+            weeks = None
+        else:
+            try:
+                weeks = int(weeks)
+            except ValueError:
+                weeks = None
+        if weeks is None or not 1 <= weeks <= BookingService.MAX_BATCH_SIZE:
+            return jsonify({
+                'error': f'weeks deve ser um inteiro entre 1 e {BookingService.MAX_BATCH_SIZE}.'
+            }), 400
+    else:
+        raw_slots = payload.get('slots', [])
+        if not isinstance(raw_slots, list) or not all(isinstance(value, str) for value in raw_slots):
+            return jsonify({'error': 'slots deve ser uma lista de "YYYY-MM-DD HH:MM".'}), 400
+        if len(raw_slots) > BookingService.MAX_BATCH_SIZE:
+            return jsonify({
+                'error': f'Máximo de {BookingService.MAX_BATCH_SIZE} horários por lote.'
+            }), 400
+
+    try:
+        if payload.get('start'):
+            first_slot = datetime.strptime(payload['start'], '%Y-%m-%d %H:%M')
+            slots = BookingService.recurring_slots(first_slot, weeks)
+        else:
+            slots = [datetime.strptime(value, '%Y-%m-%d %H:%M') for value in raw_slots]
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Formato de data/hora inválido.'}), 400
+
+    try:
+        report = BookingService.create_bookings(current_user.id, service_id, slots)
+    except InvalidSlotError as e:
+        return jsonify({'error': str(e)}), 400
+    except BookingBatchError as e:
+        return jsonify({'error': str(e), 'slots': e.report}), 409
+    except BookingConflictError as e:
+        return jsonify({'error': str(e)}), 409
+
+    return jsonify({'created': len(report), 'slots': report}), 201
+
 
 # =============================================================
 # RF06 - ROTA DE MEUS AGENDAMENTOS (sem mudanças)
@@ -371,6 +413,7 @@ def edit_profile():
         # ❌ NUNCA mexer em current_user.perfil aqui
 
         db.session.commit()
+        user_cache.invalidate(current_user.id)
         flash('Perfil atualizado com sucesso!', 'success')
         return redirect(url_for('client.my_profile'))
 
@@ -1,9 +1,8 @@
 # app/config/config.py
 
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
+# O .env é carregado pelo ponto de entrada (run.py / CLI do Flask), não no import
 
 # Convenção de nomenclatura para SQLAlchemy/Alembic
 NAMING_CONVENTION = {
@@ -14,21 +13,111 @@ NAMING_CONVENTION = {
     "pk": "pk_%(table_name)s"
 }
 
+def _env_flag(name, default):
+    return os.environ.get(name, str(default)).lower() in ('1', 'true', 'yes', 'on')
+
+
+def sqlite_pragmas_from_env():
+    """PRAGMAs aplicados em cada conexão SQLite (ver app/extensions/engine.py)."""
+    return {
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),  # ms
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),  # bytes
+        'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE', -64 * 1024)),  # negativo = KiB
+    }
+
+
+def pool_options_from_env():
+    """Pool de conexões para bancos servidor (PostgreSQL/MySQL)."""
+    return {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 30)),  # segundos
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),  # segundos
+        'pool_pre_ping': _env_flag('DB_POOL_PRE_PING', True),
+    }
+
+
 class Config:
     """Configuração base da aplicação."""
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'default_fallback_key_nao_usar_em_producao'
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///instance/database.db'
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///database.db'  # relativo à pasta instance
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    
-    if not os.path.exists('instance'):
-        os.makedirs('instance')
+
+    # PRAGMAs por conexão SQLite (vazio = padrões do SQLite)
+    SQLITE_PRAGMAS = {}
+
+    # Réplica de leitura (GETs e relatórios); ex.: sqlite:///replica.db para teste local
+    REPLICA_DATABASE_URL = os.environ.get('REPLICA_DATABASE_URL')
+    SQLALCHEMY_BINDS = {'replica': REPLICA_DATABASE_URL} if REPLICA_DATABASE_URL else {}
+    REPLICA_READ_YOUR_WRITES = int(os.environ.get('REPLICA_READ_YOUR_WRITES', 5))  # segundos no primário após escrever
+
+    # Cache de disponibilidade (available_slots)
+    AVAILABILITY_CACHE_SIZE = int(os.environ.get('AVAILABILITY_CACHE_SIZE', 1024))
+    AVAILABILITY_CACHE_TTL = int(os.environ.get('AVAILABILITY_CACHE_TTL', 30))  # segundos
+
+    # Modelo semanal compilado de Schedule (recompilado após edições no admin)
+    SCHEDULE_TEMPLATE_TTL = int(os.environ.get('SCHEDULE_TEMPLATE_TTL', 60))  # segundos
+
+    # Cache do user_loader (dados de identidade/perfil do current_user)
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 1024))
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))  # segundos
+
+    # Hash de senhas (formato Werkzeug: 'scrypt:n:r:p' ou 'pbkdf2:sha256:iteracoes')
+    # executado em um pool limitado; hashes com outros parâmetros são refeitos no login
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', min(4, os.cpu_count() or 1)))
+    PASSWORD_HASH_TIMEOUT = int(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))  # segundos
+
+    # Reconstrói na partida as tabelas derivadas vazias (ocupação...) de um banco já populado
+    AUTO_BACKFILL = _env_flag('AUTO_BACKFILL', True)
+
+    # Cache de bytecode dos templates (pasta relativa à instance; vazio = desligado)
+    JINJA_BYTECODE_CACHE_DIR = os.environ.get('JINJA_BYTECODE_CACHE_DIR')
+
+    # Instrumentação de SQL por request (/admin/debug/sql e aviso de N+1); o header
+    # Server-Timing só vai para administradores ou com DEBUG
+    SQL_PROFILER_ENABLED = _env_flag('SQL_PROFILER_ENABLED', True)
+    SQL_PROFILER_N1_THRESHOLD = int(os.environ.get('SQL_PROFILER_N1_THRESHOLD', 10))  # repetições da mesma consulta
+    SQL_PROFILER_HISTORY = int(os.environ.get('SQL_PROFILER_HISTORY', 50))  # requests guardados
+
+    # Métricas em memória (latência por endpoint, SQL, caches, agendamentos) em /admin/metrics;
+    # METRICS_TOKEN libera a coleta pelo Prometheus com 'Authorization: Bearer <token>'
+    METRICS_ENABLED = _env_flag('METRICS_ENABLED', True)
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
 
 class DevelopmentConfig(Config):
     """Configuração para ambiente de desenvolvimento."""
     DEBUG = True
     SQLALCHEMY_ECHO = True # Adicionado para debug
 
+class ProductionConfig(Config):
+    """
+    Produção: SQLite em WAL com synchronous=NORMAL, busy_timeout, mmap e
+    cache maiores; bancos servidor com pool dimensionado, pre-ping e
+    reciclagem. Tudo ajustável por variáveis de ambiente.
+    """
+    DEBUG = False
+    SQLALCHEMY_ECHO = False
+    SQLITE_PRAGMAS = sqlite_pragmas_from_env()
+    JINJA_BYTECODE_CACHE_DIR = os.environ.get('JINJA_BYTECODE_CACHE_DIR', 'jinja_cache')
+    SQL_PROFILER_ENABLED = _env_flag('SQL_PROFILER_ENABLED', False)  # ligar só para diagnóstico
+    SQLALCHEMY_ENGINE_OPTIONS = (
+        {} if Config.SQLALCHEMY_DATABASE_URI.startswith('sqlite') else pool_options_from_env()
+    )
+
 class TestingConfig(Config):
     """Configuração para ambiente de testes."""
     TESTING = True
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
\ No newline at end of file
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'  # Barato para acelerar os testes
+
+
+# Seleção pela variável de ambiente APP_CONFIG (ver run.py)
+config_by_name = {
+    'default': Config,
+    'development': DevelopmentConfig,
+    'production': ProductionConfig,
+    'testing': TestingConfig,
+}
@@ -0,0 +1,70 @@
+# app/extensions/async_db.py
+
+import threading
+
+from sqlalchemy.pool import NullPool
+
+# Driver assíncrono equivalente a cada driver síncrono
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+    'mysql': 'mysql+aiomysql',
+}
+
+
+class AsyncDatabase:
+    """
+    Engine/sessões assíncronas (SQLAlchemy asyncio) sobre o mesmo banco e os
+    mesmos modelos de 'db'. Usado pelas views async do blueprint 'api'.
+
+    O Flask executa cada view async em seu próprio event loop e conexões
+    asyncio não podem trocar de loop, por isso o engine usa NullPool.
+    Os listeners de sessão (ocupação, contadores, cache, soft delete) são
+    registrados na classe Session e valem também aqui.
+    """
+
+    def __init__(self):
+        self.engine = None
+        self.sessionmaker = None
+        self._url = None
+        self._pragmas = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app, db):
+        """
+        Só guarda a URL: o engine (e o import de sqlalchemy.ext.asyncio e do
+        driver) é criado na primeira sessão, fora do caminho de inicialização.
+        """
+        self.engine = self.sessionmaker = self._url = None
+        with app.app_context():
+            url = db.engine.url  # já resolvida pelo Flask-SQLAlchemy (caminho do SQLite)
+        backend = url.get_backend_name()
+        if backend not in ASYNC_DRIVERS:
+            app.logger.warning(f"API assíncrona indisponível para o banco '{backend}'.")
+            return
+        self._url = url.set(drivername=ASYNC_DRIVERS[backend])
+        self._pragmas = app.config.get('SQLITE_PRAGMAS')
+
+    def _create(self):
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        from app.extensions.engine import apply_sqlite_pragmas
+
+        with self._lock:
+            if self.sessionmaker is None:
+                # ImportError (driver não instalado) sobe para quem pediu a sessão
+                self.engine = create_async_engine(self._url, poolclass=NullPool)
+                apply_sqlite_pragmas(self.engine.sync_engine, self._pragmas)
+                self.sessionmaker = async_sessionmaker(self.engine, expire_on_commit=False)
+        return self.sessionmaker
+
+    def session(self):
+        """Nova AsyncSession (use com 'async with')."""
+        if self.sessionmaker is None:
+            if self._url is None:
+                raise RuntimeError('Banco assíncrono não inicializado (banco sem driver async).')
+            self._create()
+        return self.sessionmaker()
+
+
+async_db = AsyncDatabase()
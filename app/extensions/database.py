@@ -1,3 +1,4 @@
 # app/extensions/database.py
 from flask_sqlalchemy import SQLAlchemy
-db = SQLAlchemy()
\ No newline at end of file
+from app.extensions.replica import RoutingSession
+db = SQLAlchemy(session_options={'class_': RoutingSession})
\ No newline at end of file
@@ -0,0 +1,123 @@
+# app/extensions/engine.py
+
+from sqlalchemy import event
+
+
+def apply_sqlite_pragmas(engine, pragmas):
+    """
+    Executa os PRAGMAs em cada nova conexão SQLite do engine
+    (journal_mode, synchronous, busy_timeout, mmap_size, cache_size...).
+    """
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+
+def init_engine(app, db):
+    """Aplica o perfil de conexão do Config (SQLITE_PRAGMAS) a todos os engines."""
+    pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+    with app.app_context():
+        for engine in db.engines.values():
+            apply_sqlite_pragmas(engine, pragmas)
+
+
+# =============================================================
+# BENCHMARK (CLI)
+# =============================================================
+
+def register_cli_commands(app):
+    import click
+    import os
+    import statistics
+    import tempfile
+    import threading
+    import time
+
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.exc import OperationalError
+
+    from app.config.config import sqlite_pragmas_from_env
+
+    @app.cli.command("bench-db-writers")
+    @click.option('--writers', default=8, show_default=True, help='Threads escrevendo ao mesmo tempo.')
+    @click.option('--writes', default=200, show_default=True, help='Transações (INSERT + COMMIT) por thread.')
+    @click.option('--readers', default=2, show_default=True, help='Threads lendo durante as escritas.')
+    def bench_db_writers(writers, writes, readers):
+        """
+        Escritores concorrentes em SQLite (arquivo temporário): padrão do
+        SQLite x perfil de produção (PRAGMAs de SQLITE_* do ambiente).
+        """
+        profiles = {
+            'padrão (journal DELETE)': {},
+            'produção (WAL)': sqlite_pragmas_from_env(),
+        }
+
+        for label, pragmas in profiles.items():
+            path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+            engine = create_engine(f'sqlite:///{path}', pool_size=writers + readers)
+            apply_sqlite_pragmas(engine, pragmas)
+            with engine.begin() as conn:
+                conn.execute(text(
+                    'CREATE TABLE bench (id INTEGER PRIMARY KEY, payload TEXT, created REAL)'
+                ))
+
+            latencies, errors, reads = [], [0], [0]
+            lock = threading.Lock()
+            stop = threading.Event()
+
+            def writer(n):
+                local = []
+                for i in range(writes):
+                    start = time.perf_counter()
+                    try:
+                        with engine.begin() as conn:
+                            conn.execute(
+                                text('INSERT INTO bench (payload, created) VALUES (:p, :c)'),
+                                {'p': f'{n}-{i}', 'c': start}
+                            )
+                        local.append(time.perf_counter() - start)
+                    except OperationalError:
+                        with lock:
+                            errors[0] += 1
+                with lock:
+                    latencies.extend(local)
+
+            def reader():
+                while not stop.is_set():
+                    try:
+                        with engine.connect() as conn:
+                            conn.execute(text('SELECT count(*) FROM bench')).scalar()
+                        with lock:
+                            reads[0] += 1
+                    except OperationalError:
+                        with lock:
+                            errors[0] += 1
+
+            read_threads = [threading.Thread(target=reader) for _ in range(readers)]
+            write_threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+            started = time.perf_counter()
+            for t in read_threads + write_threads:
+                t.start()
+            for t in write_threads:
+                t.join()
+            elapsed = time.perf_counter() - started
+            stop.set()
+            for t in read_threads:
+                t.join()
+            engine.dispose()
+
+            latencies.sort()
+            p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0.0
+            click.echo(
+                f"{label}: {len(latencies) / elapsed:.0f} escritas/s | "
+                f"mediana={statistics.median(latencies) * 1000 if latencies else 0:.2f}ms "
+                f"p95={p95 * 1000:.2f}ms | leituras={reads[0]} | erros={errors[0]}"
+            )
@@ -1,6 +1,10 @@
+# app/extensions/login_manager.py
+
 from flask_login import LoginManager
 
 login_manager = LoginManager()
 
 # 🔐 endpoint correto do blueprint de autenticação
 login_manager.login_view = 'auth.login'
+login_manager.login_message = 'Por favor, faça login para acessar esta página.'
+login_manager.login_message_category = 'warning'
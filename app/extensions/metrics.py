@@ -0,0 +1,376 @@
+# app/extensions/metrics.py
+
+import hmac
+import threading
+import time
+from bisect import bisect_left
+
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Limites padrão (segundos) dos histogramas de latência
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+# Content-Type do formato texto do Prometheus
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# =============================================================
+# MÉTRICAS
+# =============================================================
+
+class _CounterChild:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class _HistogramChild:
+    __slots__ = ('bounds', 'buckets', 'sum', 'count', '_lock')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)  # último = acima do maior limite
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.buckets[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.buckets), self.sum, self.count
+
+
+class _Metric:
+    """Métrica com rótulos; cada combinação de valores tem seu próprio lock."""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f'{self.name}: esperados rótulos {self.labelnames}')
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _items(self):
+        with self._lock:
+            return sorted(self._children.items())
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def render(self):
+        for values, child in self._items():
+            yield f'{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}'
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.bounds = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.bounds)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def render(self):
+        for values, child in self._items():
+            buckets, total, count = child.snapshot()
+            cumulative = 0
+            for bound, n in zip((*self.bounds, float('inf')), buckets):
+                cumulative += n
+                labels = _format_labels(self.labelnames, values, [('le', _format_value(bound))])
+                yield f'{self.name}_bucket{labels} {cumulative}'
+            labels = _format_labels(self.labelnames, values)
+            yield f'{self.name}_sum{labels} {_format_value(total)}'
+            yield f'{self.name}_count{labels} {count}'
+
+
+# =============================================================
+# REGISTRO
+# =============================================================
+
+class MetricsRegistry:
+    """
+    Registro de métricas em memória do processo (contadores e histogramas
+    com rótulos), seguro entre threads e exportado no formato texto do
+    Prometheus em /admin/metrics.
+
+    Com METRICS_ENABLED, mede latência/vazão por endpoint e o tempo de cada
+    consulta SQL; caches entram pelos contadores que já mantêm (lidos só
+    na coleta, sem custo por operação). Em múltiplos workers, cada processo
+    exporta seus próprios valores.
+    """
+
+    _listening = False
+
+    def __init__(self):
+        self.enabled = False
+        self.token = None
+        self._metrics = {}
+        self._caches = {}
+        self._lock = threading.Lock()
+
+        self.http_requests = self.counter(
+            'http_requests_total', 'Requests HTTP atendidos.', ('endpoint', 'method', 'status')
+        )
+        self.http_latency = self.histogram(
+            'http_request_duration_seconds', 'Latência dos requests HTTP.', ('endpoint', 'method')
+        )
+        self.db_latency = self.histogram(
+            'db_query_duration_seconds', 'Tempo de execução das consultas SQL.', ('dialect',),
+            buckets=DB_BUCKETS
+        )
+
+    def init_app(self, app):
+        self.enabled = app.config.get('METRICS_ENABLED', True)
+        self.token = app.config.get('METRICS_TOKEN')
+        if not self.enabled:
+            return
+
+        MetricsRegistry._listen()
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+    # =====================================================
+    # CRIAÇÃO / CONSULTA
+    # =====================================================
+
+    def _get_or_create(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def register_cache(self, name, stats):
+        """Exporta hits/misses/tamanho de um cache a partir de stats() (dict)."""
+        with self._lock:
+            self._caches[name] = stats
+
+    def check_token(self, header):
+        """True se o header Authorization traz o METRICS_TOKEN configurado (scraper)."""
+        if not self.token or not header:
+            return False
+        return hmac.compare_digest(header, f'Bearer {self.token}')
+
+    # =====================================================
+    # EXPORTAÇÃO (formato texto do Prometheus)
+    # =====================================================
+
+    def render(self):
+        lines = []
+        with self._lock:
+            metrics = sorted(self._metrics.items())
+            caches = sorted(self._caches.items())
+
+        for name, metric in metrics:
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            lines.extend(metric.render())
+
+        cache_series = (
+            ('cache_hits_total', 'counter', 'Acertos do cache.', 'hits'),
+            ('cache_misses_total', 'counter', 'Faltas do cache.', 'misses'),
+            ('cache_entries', 'gauge', 'Entradas no cache.', 'size'),
+        )
+        stats = {name: fn() for name, fn in caches}
+        for metric_name, kind, documentation, key in cache_series:
+            lines.append(f'# HELP {metric_name} {documentation}')
+            lines.append(f'# TYPE {metric_name} {kind}')
+            for cache_name, values in stats.items():
+                if key in values:
+                    lines.append(f'{metric_name}{{cache="{_escape(cache_name)}"}} {values[key]}')
+
+        return '\n'.join(lines) + '\n'
+
+    # =====================================================
+    # INSTRUMENTAÇÃO (requests e consultas)
+    # =====================================================
+
+    @classmethod
+    def _listen(cls):
+        # Registrado uma única vez por processo (várias apps reaproveitam)
+        if cls._listening:
+            return
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+        cls._listening = True
+
+    def _start_request(self):
+        g._metrics_started = time.perf_counter()
+
+    def _finish_request(self, response):
+        started = g.pop('_metrics_started', None)
+        if started is not None and request.endpoint != 'static':
+            endpoint = request.endpoint or 'none'
+            self.http_latency.labels(endpoint, request.method).observe(time.perf_counter() - started)
+            self.http_requests.labels(endpoint, request.method, str(response.status_code)).inc()
+        return response
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if metrics.enabled:
+        conn.info.setdefault('_metrics_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('_metrics_started')
+    if started:
+        metrics.db_latency.labels(conn.engine.dialect.name).observe(time.perf_counter() - started.pop())
+
+
+def _handle_error(exception_context):
+    # Erro no execute: sem observação de latência, só remove o timestamp da pilha
+    conn = exception_context.connection
+    if conn is None or exception_context.execution_context is None:
+        return
+    started = conn.info.get('_metrics_started')
+    if started:
+        started.pop()
+
+
+metrics = MetricsRegistry()
+
+
+# =============================================================
+# BENCHMARK DE OVERHEAD (CLI)
+# =============================================================
+
+def register_cli_commands(app):
+    import click
+    import os
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
+    from datetime import datetime, timedelta
+
+    @app.cli.command("bench-metrics")
+    @click.option('--requests', 'total', default=2000, show_default=True, help='Requests por modo.')
+    @click.option('--observations', default=200000, show_default=True, help='Observações no micro-benchmark.')
+    @click.option('--threads', default=8, show_default=True, help='Threads no micro-benchmark.')
+    def bench_metrics(total, observations, threads):
+        """
+        Custo das métricas: ns por observação (histograma + contador, com
+        threads concorrentes) e vazão de /client/api/available_slots com
+        METRICS_ENABLED desligado x ligado.
+        """
+        from app import create_app, db
+        from app.config.config import TestingConfig
+        from app.models.base import BaseMixin
+        from app.models.schedule import Schedule
+        from app.models.service import Service
+        from app.models.user import User
+
+        # 1. Micro-benchmark (registro isolado, não afeta o exportado)
+        registry = MetricsRegistry()
+        histogram = registry.histogram('bench_seconds', 'bench', ('endpoint',))
+        counter = registry.counter('bench_total', 'bench', ('endpoint', 'status'))
+        per_thread = observations // threads
+
+        def observe(n):
+            for i in range(per_thread):
+                histogram.labels('client.available_slots').observe(i * 1e-6)
+                counter.labels('client.available_slots', '200').inc()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(observe, range(threads)))
+        elapsed = time.perf_counter() - started
+        done = per_thread * threads
+        click.echo(f"Micro: {elapsed / done * 1e9:.0f}ns por request medido "
+                   f"(histograma + contador, {threads} threads, {done} observações)")
+
+        # 2. Requests reais (test client, SQLite temporário)
+        tmp_dir = tempfile.mkdtemp()
+        day = (datetime.now() + timedelta(days=1)).date()
+        query = f"/client/api/available_slots?date={day.strftime('%Y-%m-%d')}&service_id=1"
+
+        def run(enabled):
+            class BenchConfig(TestingConfig):
+                SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tmp_dir, f'metrics_{enabled}.db')}"
+                METRICS_ENABLED = enabled
+                SQL_PROFILER_ENABLED = False
+
+            bench_app = create_app(BenchConfig)
+            with bench_app.app_context():
+                db.create_all()
+                user = User(nome='Bench', email='bench@sistema.com')
+                user.set_password('bench')
+                schedule = Schedule(dia_semana=day.weekday(), hora_inicio='08:00', hora_fim='18:00')
+                BaseMixin.save_all([user, Service(nome='Bench', duracao=30), schedule])
+
+            client = bench_app.test_client()
+            client.post('/auth/login', data={'email': 'bench@sistema.com', 'senha': 'bench'})
+            client.get(query)  # aquece cache/template
+            started = time.perf_counter()
+            for _ in range(total):
+                client.get(query)
+            return total / (time.perf_counter() - started)
+
+        # Desligado primeiro: init_app do app ligado ativa os eventos globais do Engine
+        off = run(False)
+        on = run(True)
+        click.echo(f"Requests: desligado={off:.0f} req/s | ligado={on:.0f} req/s | "
+                   f"overhead={(off - on) / off * 100:.1f}%")
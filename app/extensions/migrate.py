@@ -1,5 +1,17 @@
 # app/extensions/migrate.py
-from flask_migrate import Migrate
-from app.extensions.database import db
 
-migrate = Migrate()
\ No newline at end of file
+
+def init_migrate(app, db):
+    """
+    Flask-Migrate importa o Alembic inteiro (~150ms); só é necessário para
+    os comandos 'flask db ...', então é registrado apenas quando o app é
+    carregado pela CLI do Flask (workers do servidor WSGI não pagam o custo).
+    """
+    import click
+
+    if click.get_current_context(silent=True) is None:
+        return None
+
+    from flask_migrate import Migrate
+
+    return Migrate(app, db, render_as_batch=True)
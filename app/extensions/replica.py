@@ -0,0 +1,102 @@
+# app/extensions/replica.py
+
+import time
+from contextlib import contextmanager
+
+from flask import request, session as flask_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import Select
+
+# Chave do bind de leitura em SQLALCHEMY_BINDS
+REPLICA_BIND = 'replica'
+
+# Métodos HTTP que só leem (roteados para a réplica)
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class RoutingSession(Session):
+    """
+    Sessão que envia SELECTs para a réplica quando 'read_replica' está
+    ligado em session.info (requests GET fora da janela de
+    read-your-writes). Escritas, flush e comandos não-SELECT vão sempre
+    para o primário, e marcam a sessão como 'wrote'.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            is_read = isinstance(clause, Select) and not self._flushing
+            if is_read and self.info.get('read_replica'):
+                replica = self._db.engines.get(REPLICA_BIND)
+                if replica is not None:
+                    return replica
+            elif not is_read and (self._flushing or clause is not None):
+                self.info['wrote'] = True
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@contextmanager
+def use_primary(session):
+    """Força leituras no primário dentro do bloco (ex.: ler-e-gravar no mesmo GET)."""
+    previous = session.info.get('read_replica', False)
+    session.info['read_replica'] = False
+    try:
+        yield session
+    finally:
+        session.info['read_replica'] = previous
+
+
+def init_replica(app, db):
+    """
+    Liga o roteamento por request quando há um bind 'replica' configurado
+    (REPLICA_DATABASE_URL). Depois de uma escrita, o cliente lê do primário
+    por REPLICA_READ_YOUR_WRITES segundos (marcado na sessão Flask), para
+    não ver dados defasados logo após finalizar/cancelar um agendamento.
+    """
+    if REPLICA_BIND not in (app.config.get('SQLALCHEMY_BINDS') or {}):
+        return
+
+    window = app.config.get('REPLICA_READ_YOUR_WRITES', 5)
+
+    @app.before_request
+    def _route_reads():
+        db.session.info['read_replica'] = (
+            request.method in SAFE_METHODS
+            and flask_session.get('_primary_until', 0) < time.time()
+        )
+
+    @app.after_request
+    def _mark_writes(response):
+        if request.method not in SAFE_METHODS or db.session.info.get('wrote'):
+            flask_session['_primary_until'] = time.time() + window
+        return response
+
+
+# =============================================================
+# COMANDO CLI (réplica local em SQLite)
+# =============================================================
+
+def register_cli_commands(app):
+    import click
+    import sqlite3
+
+    @app.cli.command("sync-replica")
+    def sync_replica():
+        """Copia o banco SQLite primário para o arquivo da réplica (teste local)."""
+        from app import db
+
+        engines = db.engines
+        if REPLICA_BIND not in engines:
+            raise click.ClickException('Configure REPLICA_DATABASE_URL.')
+        primary, replica = engines[None], engines[REPLICA_BIND]
+        if primary.dialect.name != 'sqlite' or replica.dialect.name != 'sqlite':
+            raise click.ClickException('Disponível apenas para SQLite.')
+
+        replica.dispose()
+        source = sqlite3.connect(primary.url.database)
+        target = sqlite3.connect(replica.url.database)
+        try:
+            source.backup(target)
+        finally:
+            source.close()
+            target.close()
+        click.echo(f"Réplica atualizada: {primary.url.database} -> {replica.url.database}")
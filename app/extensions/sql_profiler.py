@@ -0,0 +1,172 @@
+# app/extensions/sql_profiler.py
+
+import re
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from functools import lru_cache
+
+from flask import current_app, g, has_app_context, request
+from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Listas de parâmetros (IN (?, ?, ?)) viram um único marcador
+_IN_LIST = re.compile(r'\bIN \((?:[^()]|\([^()]*\))*\)', re.IGNORECASE)
+_SPACES = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=2048)
+def statement_shape(statement):
+    """Forma normalizada do SQL (parâmetros já vêm como '?' / '%(x)s')."""
+    return _IN_LIST.sub('IN (...)', _SPACES.sub(' ', statement).strip())
+
+
+class RequestProfile:
+    """Consultas de um request: quantidade, tempo total e contagem por forma."""
+
+    __slots__ = ('started', 'count', 'db_time', 'shapes')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.count = 0
+        self.db_time = 0.0
+        self.shapes = Counter()
+
+    def record(self, statement, elapsed):
+        self.count += 1
+        self.db_time += elapsed
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, minimum=2):
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= minimum]
+
+
+class SQLProfiler:
+    """
+    Instrumentação de SQL por request via eventos de cursor do Engine
+    (vale para todos os engines: primário, réplica e o async).
+
+    Cada request acumula quantidade de consultas, tempo no banco e as
+    formas de SQL repetidas; o resultado vai no header Server-Timing (só
+    com DEBUG ou para administradores, para não expor tempos internos),
+    fica nos últimos SQL_PROFILER_HISTORY requests (página /admin/debug/sql) e
+    gera um aviso de possível N+1 quando a mesma forma se repete mais de
+    SQL_PROFILER_N1_THRESHOLD vezes.
+    """
+
+    _listening = False
+
+    def __init__(self, threshold=10, history=50):
+        self.enabled = False
+        self.threshold = threshold
+        self._history = deque(maxlen=history)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.enabled = app.config.get('SQL_PROFILER_ENABLED', True)
+        self.threshold = app.config.get('SQL_PROFILER_N1_THRESHOLD', self.threshold)
+        self._history = deque(maxlen=app.config.get('SQL_PROFILER_HISTORY', self._history.maxlen))
+        if not self.enabled:
+            return
+
+        SQLProfiler._listen()
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+    # =====================================================
+    # EVENTOS DO ENGINE
+    # =====================================================
+
+    @classmethod
+    def _listen(cls):
+        # Registrado uma única vez por processo (várias apps reaproveitam)
+        if cls._listening:
+            return
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+        cls._listening = True
+
+    # =====================================================
+    # CICLO DO REQUEST
+    # =====================================================
+
+    def _start_request(self):
+        g._sql_profile = RequestProfile()
+
+    def _finish_request(self, response):
+        profile = g.pop('_sql_profile', None)
+        if profile is None or request.endpoint == 'static':
+            return response
+
+        total = time.perf_counter() - profile.started
+        if current_app.debug or getattr(current_user, 'is_admin', False):
+            response.headers.add(
+                'Server-Timing',
+                f'db;dur={profile.db_time * 1000:.1f};desc="{profile.count} queries", '
+                f'app;dur={total * 1000:.1f}'
+            )
+
+        repeated = profile.repeated()
+        suspects = [(shape, n) for shape, n in repeated if n > self.threshold]
+        if suspects:
+            shape, n = suspects[0]
+            current_app.logger.warning(
+                f"Possível N+1 em {request.method} {request.path} ({request.endpoint}): "
+                f"{n}x {shape[:200]}"
+            )
+
+        entry = {
+            'at': datetime.now(),
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'queries': profile.count,
+            'db_ms': round(profile.db_time * 1000, 2),
+            'total_ms': round(total * 1000, 2),
+            'repeated': repeated[:10],
+            'n_plus_one': bool(suspects),
+        }
+        with self._lock:
+            self._history.append(entry)
+        return response
+
+    def recent(self):
+        """Últimos requests medidos, do mais recente para o mais antigo."""
+        with self._lock:
+            return list(reversed(self._history))
+
+    def clear(self):
+        with self._lock:
+            self._history.clear()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_app_context() and '_sql_profile' in g:
+        conn.info.setdefault('_sql_profiler_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('_sql_profiler_started')
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    profile = g.get('_sql_profile') if has_app_context() else None
+    if profile is not None:
+        profile.record(statement, elapsed)
+
+
+def _handle_error(exception_context):
+    # Consulta que falhou não passa pelo after_cursor_execute: descarta o início
+    conn = exception_context.connection
+    if conn is None or exception_context.execution_context is None:
+        return
+    started = conn.info.get('_sql_profiler_started')
+    if started:
+        started.pop()
+
+
+sql_profiler = SQLProfiler()
@@ -0,0 +1,112 @@
+# app/extensions/startup.py
+
+import os
+
+
+def init_jinja_cache(app):
+    """
+    Cache de bytecode dos templates Jinja em disco (JINJA_BYTECODE_CACHE_DIR,
+    relativo à pasta instance): workers novos não recompilam os templates.
+    Entra em jinja_options, então o ambiente Jinja continua sendo criado
+    só no primeiro render.
+    """
+    cache_dir = app.config.get('JINJA_BYTECODE_CACHE_DIR')
+    if not cache_dir:
+        return
+
+    from jinja2 import FileSystemBytecodeCache
+
+    cache_dir = os.path.join(app.instance_path, cache_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+    app.jinja_options = {**app.jinja_options, 'bytecode_cache': FileSystemBytecodeCache(cache_dir)}
+
+
+# =============================================================
+# BENCHMARK DE INICIALIZAÇÃO (CLI)
+# =============================================================
+
+# Executado em um interpretador novo: import + create_app + primeiro request
+_STARTUP_SCRIPT = '''
+import json, os, time
+started = time.perf_counter()
+from app import create_app
+from app.config.config import config_by_name
+imported = time.perf_counter()
+app = create_app(config_by_name[os.environ.get('APP_CONFIG', 'default')])
+created = time.perf_counter()
+status = app.test_client().get('/auth/login').status_code
+served = time.perf_counter()
+print(json.dumps({
+    'import': imported - started,
+    'create_app': created - imported,
+    'first_request': served - created,
+    'status': status,
+}))
+'''
+
+
+def register_cli_commands(app):
+    import click
+    import json
+    import statistics
+    import subprocess
+    import sys
+    import tempfile
+    import time
+
+    @app.cli.command("bench-startup")
+    @click.option('--runs', default=5, show_default=True, help='Processos medidos.')
+    @click.option('--config', 'config_name', default='production', show_default=True,
+                  help='Perfil de APP_CONFIG usado nos processos.')
+    @click.option('--budget-ms', type=float, default=lambda: float(os.environ.get('STARTUP_BUDGET_MS', 1500)),
+                  show_default='STARTUP_BUDGET_MS ou 1500', help='Orçamento (mediana) do import ao primeiro request.')
+    def bench_startup(runs, config_name, budget_ms):
+        """
+        Tempo de partida a frio de um worker (import, create_app e primeiro
+        request) em processos novos. Sai com erro se a mediana passar do
+        orçamento, para uso no CI.
+        """
+        root = os.path.dirname(app.root_path)
+        tmp_dir = tempfile.mkdtemp()
+        env = {
+            **os.environ,
+            'APP_CONFIG': config_name,
+            'DATABASE_URL': f"sqlite:///{os.path.join(tmp_dir, 'startup.db')}",
+            'JINJA_BYTECODE_CACHE_DIR': os.path.join(tmp_dir, 'jinja_cache'),
+            'PYTHONPATH': os.pathsep.join(filter(None, [root, os.environ.get('PYTHONPATH')])),
+        }
+
+        samples = []
+        for run in range(runs):
+            started = time.perf_counter()
+            result = subprocess.run(
+                [sys.executable, '-c', _STARTUP_SCRIPT],
+                env=env, cwd=tmp_dir, capture_output=True, text=True
+            )
+            process = time.perf_counter() - started
+            if result.returncode != 0:
+                raise click.ClickException(f"Falha ao iniciar o app:\n{result.stderr}")
+            sample = json.loads(result.stdout.strip().splitlines()[-1])
+            sample['total'] = sample['import'] + sample['create_app'] + sample['first_request']
+            sample['process'] = process
+            samples.append(sample)
+            click.echo(
+                f"#{run + 1}: import={sample['import'] * 1000:.0f}ms "
+                f"create_app={sample['create_app'] * 1000:.0f}ms "
+                f"primeiro request={sample['first_request'] * 1000:.0f}ms (HTTP {sample['status']}) "
+                f"| total={sample['total'] * 1000:.0f}ms processo={process * 1000:.0f}ms"
+            )
+
+        median = {
+            key: statistics.median(s[key] for s in samples) * 1000
+            for key in ('import', 'create_app', 'first_request', 'total', 'process')
+        }
+        click.echo(
+            f"Mediana: import={median['import']:.0f}ms create_app={median['create_app']:.0f}ms "
+            f"primeiro request={median['first_request']:.0f}ms | total={median['total']:.0f}ms "
+            f"(orçamento {budget_ms:.0f}ms)"
+        )
+        if median['total'] > budget_ms:
+            raise click.ClickException(
+                f"Inicialização acima do orçamento: {median['total']:.0f}ms > {budget_ms:.0f}ms"
+            )
@@ -1,5 +1,15 @@
+from contextlib import contextmanager
 from flask import current_app
 from datetime import datetime
+from sqlalchemy import Column, DateTime, event
+from sqlalchemy.orm import Session, with_loader_criteria
+
+# Profundidade de unit_of_work() aberta na sessão (guardada em session.info)
+UOW_DEPTH_KEY = 'unit_of_work_depth'
+
+# Ids por IN/flush em soft_delete_by_ids (abaixo do limite de variáveis do SQLite)
+SOFT_DELETE_CHUNK_SIZE = 500
+
 
 class BaseMixin:
     """Mixin com métodos comuns de persistência e soft delete."""
@@ -9,7 +19,8 @@ class BaseMixin:
     updated_at = None
     deleted_at = None
 
-    def _get_db_session(self):
+    @staticmethod
+    def _get_db_session():
         """
         Retorna a sessão do banco de dados (db.session)
         usando a instância global registrada no app.
@@ -17,6 +28,100 @@ class BaseMixin:
         from app import db
         return db
 
+    @staticmethod
+    def _commit(db_instance):
+        """
+        Commit imediato, ou nada se houver um unit_of_work() aberto:
+        nesse caso o bloco faz um único flush/commit ao terminar.
+        """
+        if db_instance.session.info.get(UOW_DEPTH_KEY):
+            return
+        db_instance.session.commit()
+
+    # ==========================================================
+    # UNIT OF WORK (uma transação para várias operações)
+    # ==========================================================
+
+    @classmethod
+    @contextmanager
+    def unit_of_work(cls):
+        """
+        Adia os commits de save/soft_delete/restore/delete dentro do bloco:
+
+            with BaseMixin.unit_of_work():
+                a.save()
+                b.delete()
+
+        Ao sair, faz um único flush + commit. Qualquer exceção desfaz
+        tudo (rollback) e é relançada. Blocos aninhados só comitam no
+        mais externo.
+        """
+        db_instance = cls._get_db_session()
+        session = db_instance.session
+        session.info[UOW_DEPTH_KEY] = session.info.get(UOW_DEPTH_KEY, 0) + 1
+        try:
+            yield session
+            if session.info[UOW_DEPTH_KEY] == 1:
+                session.commit()
+        except Exception as e:
+            session.rollback()
+            current_app.logger.error(f"Erro na unidade de trabalho: {e}")
+            raise
+        finally:
+            session.info[UOW_DEPTH_KEY] -= 1
+            if not session.info[UOW_DEPTH_KEY]:
+                session.info.pop(UOW_DEPTH_KEY)
+
+    @classmethod
+    def save_all(cls, objects):
+        """Salva vários objetos (de qualquer modelo) em uma única transação."""
+        db_instance = cls._get_db_session()
+        try:
+            now = datetime.utcnow()
+            for obj in objects:
+                if hasattr(obj, 'updated_at'):
+                    obj.updated_at = now
+            db_instance.session.add_all(objects)
+            cls._commit(db_instance)
+        except Exception as e:
+            db_instance.session.rollback()
+            current_app.logger.error(f"Erro ao salvar objetos: {e}")
+            raise
+
+    @classmethod
+    def soft_delete_by_ids(cls, ids, **fields):
+        """
+        Soft delete em lote: marca deleted_at (e os campos extras, ex.:
+        deleted_by) dos registros ainda ativos, passando pelos eventos de
+        sessão (ocupação, contadores, cache). Os ids são processados em
+        blocos de SOFT_DELETE_CHUNK_SIZE (um IN e um flush por bloco, dentro
+        do limite de variáveis do SQLite e com memória constante) e o commit
+        é único. Retorna os ids efetivamente excluídos.
+        """
+        if 'deleted_at' not in cls.__table__.c:
+            raise TypeError(f"{cls.__name__} não suporta soft delete.")
+
+        db_instance = cls._get_db_session()
+        try:
+            pending = sorted(set(ids))
+            now = datetime.utcnow()
+            deleted = []
+            for start in range(0, len(pending), SOFT_DELETE_CHUNK_SIZE):
+                chunk = pending[start:start + SOFT_DELETE_CHUNK_SIZE]
+                objects = cls.query.filter(cls.id.in_(chunk), cls.deleted_at.is_(None)).all()
+                for obj in objects:
+                    obj.deleted_at = now
+                    for name, value in fields.items():
+                        setattr(obj, name, value)
+                db_instance.session.flush()
+                deleted.extend(obj.id for obj in objects)
+            cls._commit(db_instance)
+            return deleted
+        except Exception as e:
+            db_instance.session.rollback()
+            current_app.logger.error(f"Erro ao soft delete em lote: {e}")
+            raise
+
     def save(self):
         """Salva ou atualiza a instância no banco."""
         db_instance = self._get_db_session()
@@ -25,7 +130,7 @@ class BaseMixin:
                 self.updated_at = datetime.utcnow()
 
             db_instance.session.add(self)
-            db_instance.session.commit()
+            self._commit(db_instance)
         except Exception as e:
             db_instance.session.rollback()
             current_app.logger.error(f"Erro ao salvar objeto: {e}")
@@ -36,7 +141,7 @@ class BaseMixin:
         db_instance = self._get_db_session()
         try:
             self.deleted_at = datetime.utcnow()
-            db_instance.session.commit()
+            self._commit(db_instance)
         except Exception as e:
             db_instance.session.rollback()
             current_app.logger.error(f"Erro ao soft delete: {e}")
@@ -47,7 +152,7 @@ class BaseMixin:
         db_instance = self._get_db_session()
         try:
             self.deleted_at = None
-            db_instance.session.commit()
+            self._commit(db_instance)
         except Exception as e:
             db_instance.session.rollback()
             current_app.logger.error(f"Erro ao restaurar objeto: {e}")
@@ -61,8 +166,41 @@ class BaseMixin:
         db_instance = self._get_db_session()
         try:
             db_instance.session.delete(self)
-            db_instance.session.commit()
+            self._commit(db_instance)
         except Exception as e:
             db_instance.session.rollback()
             current_app.logger.error(f"Erro ao deletar objeto: {e}")
             raise
+
+
+# ==========================================================
+# SOFT DELETE GLOBAL
+# ==========================================================
+
+class SoftDeleteMixin:
+    """
+    Marca modelos com soft delete (coluna deleted_at). Toda consulta ORM
+    ignora os registros excluídos, inclusive relacionamentos carregados a
+    partir dela; telas de auditoria/admin incluem os excluídos com
+    .execution_options(include_deleted=True).
+    """
+
+    # Declarada no mixin para que o critério abaixo possa ser montado sobre ele
+    deleted_at = Column(DateTime, nullable=True)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _exclude_soft_deleted(execute_state):
+    if (
+        execute_state.is_select
+        and not execute_state.is_column_load
+        and not execute_state.is_relationship_load
+        and not execute_state.execution_options.get('include_deleted', False)
+    ):
+        execute_state.statement = execute_state.statement.options(
+            with_loader_criteria(
+                SoftDeleteMixin,
+                lambda cls: cls.deleted_at.is_(None),
+                include_aliases=True
+            )
+        )
@@ -1,10 +1,25 @@
 from datetime import datetime
 from app import db
-from app.models.base import BaseMixin
+from app.models.base import BaseMixin, SoftDeleteMixin
 
-class Booking(db.Model, BaseMixin):
+# Índices parciais: só agendamentos ativos (as consultas ORM já filtram deleted_at IS NULL)
+LIVE_ROWS = db.text('deleted_at IS NULL')
+
+
+class Booking(db.Model, BaseMixin, SoftDeleteMixin):
     __tablename__ = 'agendamento'
 
+    # 🔥 ÍNDICES DAS CONSULTAS QUENTES
+    # (disponibilidade por dia, "meus agendamentos", checagem de bloco e serviço)
+    __table_args__ = (
+        db.Index('ix_agendamento_ativo_data_status', 'data', 'status',
+                 sqlite_where=LIVE_ROWS, postgresql_where=LIVE_ROWS),
+        db.Index('ix_agendamento_ativo_user_id_data', 'user_id', 'data',
+                 sqlite_where=LIVE_ROWS, postgresql_where=LIVE_ROWS),
+        db.Index('ix_agendamento_schedule_id_data', 'schedule_id', 'data'),
+        db.Index('ix_agendamento_service_id', 'service_id'),
+    )
+
     # =====================================================
     # CAMPOS
     # =====================================================
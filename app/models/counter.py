@@ -0,0 +1,19 @@
+# app/models/counter.py
+
+from app import db
+
+
+class Counter(db.Model):
+    """
+    Contadores mantidos incrementalmente (dashboard).
+    Chaves: 'servico', 'usuario', 'schedule', 'agendamento',
+    'agendamento:status:<status>' e 'agendamento:data:<YYYY-MM-DD>'.
+    Agendamentos com soft delete não são contados.
+    """
+    __tablename__ = 'contador'
+
+    chave = db.Column(db.String(100), primary_key=True)
+    valor = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<Counter {self.chave}={self.valor}>'
@@ -0,0 +1,39 @@
+# app/models/occupancy.py
+
+from datetime import datetime
+from app import db
+
+# 1 bit por minuto do dia
+MINUTES_PER_DAY = 24 * 60
+BITMAP_BYTES = MINUTES_PER_DAY // 8
+
+
+class DayOccupancy(db.Model):
+    """
+    Ocupação materializada de um dia: bitmap com 1 bit por minuto
+    (bit N ligado = minuto N ocupado por um agendamento ativo).
+    """
+    __tablename__ = 'ocupacao_dia'
+
+    data = db.Column(db.Date, primary_key=True)
+    bitmap = db.Column(db.LargeBinary(BITMAP_BYTES), nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # =====================================================
+    # CONVERSÃO BITMAP <-> INT
+    # =====================================================
+
+    @staticmethod
+    def encode(mask):
+        return mask.to_bytes(BITMAP_BYTES, 'little')
+
+    @staticmethod
+    def decode(bitmap):
+        return int.from_bytes(bitmap, 'little') if bitmap else 0
+
+    @property
+    def mask(self):
+        return self.decode(self.bitmap)
+
+    def __repr__(self):
+        return f'<DayOccupancy {self.data} ({bin(self.mask).count("1")} min)>'
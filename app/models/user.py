@@ -3,13 +3,20 @@
 from app import db  # CORREÇÃO: Importa o objeto 'db' globalmente
 from app.models.base import BaseMixin
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from app.services.password_hasher import password_hasher
 from app.models.booking import Booking  # Verifique se está correto o caminho de importação
 from sqlalchemy.orm import validates
 
 
 class User(db.Model, UserMixin, BaseMixin):
     __tablename__ = 'usuario'
+
+    # 🔎 ÍNDICES DE BUSCA (listagem por nome e typeahead sem diferenciar maiúsculas)
+    __table_args__ = (
+        db.Index('ix_usuario_nome_id', 'nome', 'id'),
+        db.Index('ix_usuario_nome_lower', db.func.lower(db.text('nome'))),
+        db.Index('ix_usuario_email_lower', db.func.lower(db.text('email'))),
+    )
     
     # ==========================================================
     # CAMPOS
@@ -39,15 +46,25 @@ class User(db.Model, UserMixin, BaseMixin):
     # MÉTODOS DE SEGURANÇA (Funções de senha)
     # ==========================================================
     def set_password(self, senha):
-        """Seta a senha após gerar um hash seguro"""
+        """Seta a senha após gerar um hash seguro (parâmetros do Config)"""
         if senha:
-            self.senha_hash = generate_password_hash(senha)
+            self.senha_hash = password_hasher.hash(senha)
         else:
             raise ValueError("A senha não pode ser vazia.")
 
     def check_password(self, senha):
         """Verifica se a senha fornecida é válida"""
-        return check_password_hash(self.senha_hash, senha)
+        return password_hasher.verify(self.senha_hash, senha)
+
+    def rehash_password(self, senha):
+        """
+        Após um login válido, refaz o hash se ele foi gerado com parâmetros
+        antigos. Retorna True se senha_hash mudou (o chamador faz o commit).
+        """
+        if password_hasher.needs_rehash(self.senha_hash):
+            self.set_password(senha)
+            return True
+        return False
 
     @property
     def is_admin(self):
@@ -59,6 +76,11 @@ class User(db.Model, UserMixin, BaseMixin):
         return f'<User {self.email} ({self.perfil})>'
     
     
+    @db.validates('email')
+    def validate_email(self, key, value):
+        """Normaliza o e-mail (sem espaços, minúsculo) antes de gravar"""
+        return value.strip().lower() if value else value
+
     @db.validates('perfil')
     def validate_perfil(self, key, value):
         """
@@ -80,7 +102,7 @@ def register_cli_commands(app):
     def create_admin(email, password):
         """Criação do administrador com dados iniciais"""
         # Verifica se o administrador já existe
-        if User.query.filter_by(email=email).first():
+        if User.query.filter(db.func.lower(User.email) == email.strip().lower()).first():
             click.echo(f"Administrador com email {email} já existe.")
             return
 
@@ -94,6 +116,5 @@ def register_cli_commands(app):
         admin.set_password(password)
         
         # Adiciona o novo administrador no banco de dados
-        db.session.add(admin)
-        db.session.commit()
+        admin.save()
         click.echo(f"Administrador ({email}) criado com sucesso!")
@@ -0,0 +1,32 @@
+# app/models/utilization.py
+
+from datetime import datetime
+from app import db
+
+
+class UtilizationRollup(db.Model):
+    """
+    Minutos agendados pré-agregados por (data, serviço, hora do dia).
+    Alimenta o relatório de utilização sem varrer 'agendamento'.
+    """
+    __tablename__ = 'utilizacao'
+
+    data = db.Column(db.Date, primary_key=True)
+    service_id = db.Column(db.Integer, db.ForeignKey('servico.id'), primary_key=True)
+    hora = db.Column(db.Integer, primary_key=True)  # 0..23
+    dia_semana = db.Column(db.Integer, nullable=False)  # 0=Segunda, 6=Domingo
+    minutos = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<UtilizationRollup {self.data} s{self.service_id} {self.hora}h={self.minutos}>'
+
+
+class UtilizationPending(db.Model):
+    """Dias alterados desde a última atualização do rollup."""
+    __tablename__ = 'utilizacao_pendente'
+
+    data = db.Column(db.Date, primary_key=True)
+    marked_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<UtilizationPending {self.data}>'
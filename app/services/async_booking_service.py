@@ -0,0 +1,217 @@
+# app/services/async_booking_service.py
+
+import asyncio
+import random
+
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+
+from app.models.booking import Booking
+from app.models.occupancy import DayOccupancy
+from app.models.service import Service
+from app.services import availability_engine, occupancy_service
+from app.services.availability_cache import availability_cache
+from app.services.booking_service import BookingConflictError, BookingService
+from app.services.schedule_template import schedule_template
+
+
+# =============================================================
+# DISPONIBILIDADE (AsyncSession)
+# =============================================================
+
+async def get_available_slots(session, service_id, day):
+    """
+    Mesma resposta de client.available_slots, com as consultas feitas
+    pela AsyncSession (o worker não fica bloqueado esperando o banco).
+    Retorna None se o serviço não existe.
+    """
+    cached = availability_cache.get(day, service_id)
+    if cached is not None:
+        return cached
+
+    service = await session.get(Service, service_id)
+    if service is None:
+        return None
+
+    bitmap = (await session.execute(
+        select(DayOccupancy.bitmap).where(DayOccupancy.data == day)
+    )).scalar()
+
+    # Modelo semanal compilado em memória (só consulta o banco ao expirar o TTL)
+    slots = availability_engine.build_slots_from_mask(
+        day,
+        schedule_template.windows(day.weekday()),
+        DayOccupancy.decode(bitmap),
+        service.duracao
+    )
+    availability_cache.set(day, service_id, slots)
+    return slots
+
+
+# =============================================================
+# CRIAÇÃO DE AGENDAMENTO (AsyncSession)
+# =============================================================
+
+async def create_booking(session, user_id, service_id, slot_datetime):
+    """
+    Versão assíncrona de BookingService.create_booking: mesma validação e
+    o mesmo compare-and-swap no bitmap do dia (executado na sessão síncrona
+    da AsyncSession via run_sync), com nova tentativa em caso de disputa.
+    Levanta InvalidSlotError ou BookingConflictError.
+    """
+    schedule_id, mask = BookingService.resolve_slot(
+        await session.get(Service, service_id), slot_datetime
+    )
+    day = slot_datetime.date()
+
+    for attempt in range(BookingService.MAX_RETRIES):
+        try:
+            claimed = await session.run_sync(
+                lambda sync_session: occupancy_service.claim(day, mask, session=sync_session)
+            )
+            if not claimed:
+                await session.rollback()
+                raise BookingConflictError('Este horário já está ocupado.')
+
+            new_booking = Booking(
+                user_id=user_id,
+                service_id=service_id,
+                data_agendamento=slot_datetime,
+                status='Pendente',
+                schedule_id=schedule_id
+            )
+            new_booking._occupancy_claimed = True
+            session.add(new_booking)
+            await session.commit()
+            return new_booking
+
+        except (occupancy_service.OccupancyChanged, OperationalError):
+            await session.rollback()
+            await asyncio.sleep(random.uniform(0, 0.005 * (2 ** attempt)))
+
+    raise BookingConflictError('Horário muito disputado. Tente novamente.')
+
+
+# =============================================================
+# TESTE DE CARGA (CLI)
+# =============================================================
+
+def register_cli_commands(app):
+    import click
+    import os
+    import statistics
+    import tempfile
+    import threading
+    import time
+    import urllib.parse
+    import urllib.request
+    from concurrent.futures import ThreadPoolExecutor
+    from datetime import datetime, timedelta
+
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    @app.cli.command("bench-async-api")
+    @click.option('--requests', 'total', default=300, show_default=True, help='Requisições por rota e nível.')
+    @click.option('--concurrency', default='1,8,32', show_default=True, help='Clientes simultâneos (lista).')
+    @click.option('--server', type=click.Choice(['werkzeug', 'uvicorn']), default='werkzeug', show_default=True,
+                  help='Servidor HTTP: WSGI com threads ou ASGI (uvicorn + WsgiToAsgi, como em asgi.py).')
+    def bench_async_api(total, concurrency, server):
+        """
+        Carga de consultas de slots: rota síncrona (/client/api/available_slots)
+        x assíncrona (/api/available_slots), servidor HTTP real em thread e
+        banco SQLite temporário, sem cache.
+        """
+        from app import create_app, db
+        from app.config.config import Config
+        from app.models.base import BaseMixin
+        from app.models.schedule import Schedule
+        from app.models.user import User
+
+        tmp_dir = tempfile.mkdtemp()
+
+        class BenchConfig(Config):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+            AVAILABILITY_CACHE_SIZE = 0
+            PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+
+        bench_app = create_app(BenchConfig)
+        day = (datetime.now() + timedelta(days=1)).date()
+        with bench_app.app_context():
+            db.create_all()
+            user = User(nome='Bench', email='bench@sistema.com')
+            user.set_password('bench')
+            service = Service(nome='Bench', duracao=30)
+            schedule = Schedule(dia_semana=day.weekday(), hora_inicio='08:00', hora_fim='18:00')
+            BaseMixin.save_all([user, service, schedule])
+            service_id = service.id
+
+        base, stop = serve(bench_app, server)
+
+        # Login uma vez; o cookie de sessão é reaproveitado por todos os clientes
+        cookies = urllib.request.HTTPCookieProcessor()
+        urllib.request.build_opener(cookies).open(base + '/auth/login', urllib.parse.urlencode(
+            {'email': 'bench@sistema.com', 'senha': 'bench'}
+        ).encode())
+        cookie = '; '.join(f'{c.name}={c.value}' for c in cookies.cookiejar)
+
+        query = f"date={day.strftime('%Y-%m-%d')}&service_id={service_id}"
+        routes = {
+            'síncrona ': f'{base}/client/api/available_slots?{query}',
+            'assíncrona': f'{base}/api/available_slots?{query}',
+        }
+
+        def fetch(url):
+            started = time.perf_counter()
+            with urllib.request.urlopen(urllib.request.Request(url, headers={'Cookie': cookie})) as response:
+                response.read()
+                ok = response.status == 200
+            return ok, time.perf_counter() - started
+
+        try:
+            for level in (int(n) for n in concurrency.split(',')):
+                for label, url in routes.items():
+                    started = time.perf_counter()
+                    with ThreadPoolExecutor(max_workers=level) as clients:
+                        results = list(clients.map(lambda _: fetch(url), range(total)))
+                    elapsed = time.perf_counter() - started
+                    latencies = sorted(latency for _, latency in results)
+                    failures = sum(1 for ok, _ in results if not ok)
+                    click.echo(
+                        f"[{level:>3} clientes] {label}: {total / elapsed:7.1f} req/s | "
+                        f"mediana={statistics.median(latencies) * 1000:.1f}ms "
+                        f"p95={latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f}ms | falhas={failures}"
+                    )
+        finally:
+            stop()
+
+    def serve(bench_app, server):
+        """Sobe o servidor em uma thread; retorna (URL base, função de parada)."""
+        if server == 'uvicorn':
+            import socket
+
+            import uvicorn
+            from asgiref.wsgi import WsgiToAsgi
+
+            sock = socket.socket()
+            sock.bind(('127.0.0.1', 0))
+            asgi_server = uvicorn.Server(uvicorn.Config(
+                WsgiToAsgi(bench_app), log_level='warning', access_log=False, lifespan='off'
+            ))
+            thread = threading.Thread(target=asgi_server.run, kwargs={'sockets': [sock]}, daemon=True)
+            thread.start()
+            while not asgi_server.started:
+                time.sleep(0.01)
+
+            def stop():
+                asgi_server.should_exit = True
+                thread.join()
+
+            return f"http://127.0.0.1:{sock.getsockname()[1]}", stop
+
+        class QuietHandler(WSGIRequestHandler):
+            def log_request(self, *args, **kwargs):
+                pass
+
+        wsgi_server = make_server('127.0.0.1', 0, bench_app, threaded=True, request_handler=QuietHandler)
+        threading.Thread(target=wsgi_server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{wsgi_server.server_port}", wsgi_server.shutdown
@@ -0,0 +1,155 @@
+# app/services/availability_cache.py
+
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+
+from app.models.booking import Booking
+from app.models.schedule import Schedule
+from app.models.service import Service
+
+
+class AvailabilityCache:
+    """
+    Cache LRU (limitado) das respostas de available_slots, chave (data, service_id).
+    A invalidação é disparada pelas escritas no banco (ver listeners abaixo);
+    o TTL limita a defasagem entre processos diferentes.
+    """
+
+    def __init__(self, maxsize=1024, ttl=30):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.maxsize = app.config.get('AVAILABILITY_CACHE_SIZE', self.maxsize)
+        self.ttl = app.config.get('AVAILABILITY_CACHE_TTL', self.ttl)
+        self.clear()
+
+    # =====================================================
+    # LEITURA / ESCRITA
+    # =====================================================
+
+    def get(self, day, service_id):
+        key = (day, service_id)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, day, service_id, value):
+        if self.maxsize <= 0:
+            return
+        key = (day, service_id)
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    # =====================================================
+    # INVALIDAÇÃO
+    # =====================================================
+
+    def invalidate(self, days=(), service_ids=(), weekdays=()):
+        """Remove as entradas das datas, serviços ou dias da semana informados."""
+        days, service_ids, weekdays = set(days), set(service_ids), set(weekdays)
+        with self._lock:
+            stale = [
+                key for key in self._data
+                if key[0] in days
+                or key[1] in service_ids
+                or key[0].weekday() in weekdays
+            ]
+            for key in stale:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0
+            }
+
+
+availability_cache = AvailabilityCache()
+
+
+# =============================================================
+# INVALIDAÇÃO DIRIGIDA POR ESCRITAS
+# =============================================================
+# As chaves afetadas são coletadas no flush e só invalidadas após o
+# commit, para que nenhuma leitura concorrente recoloque dados antigos.
+
+def _pending(session):
+    return session.info.setdefault('availability_invalidate', {
+        'days': set(), 'service_ids': set(), 'weekdays': set()
+    })
+
+
+def invalidate_on_commit(session, days=(), service_ids=(), weekdays=()):
+    """
+    Agenda invalidações para o próximo commit da sessão. Necessário para
+    escritas em lote (insert/update via Core) que não passam pelo flush.
+    """
+    pending = _pending(session)
+    pending['days'].update(days)
+    pending['service_ids'].update(service_ids)
+    pending['weekdays'].update(weekdays)
+
+
+def _history_values(obj, attr):
+    history = get_history(obj, attr)
+    return [v for v in (*history.deleted, *history.added, *history.unchanged) if v is not None]
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_invalidations(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Booking):
+            _pending(session)['days'].update(
+                d.date() for d in _history_values(obj, 'data_agendamento')
+            )
+        elif isinstance(obj, Service):
+            if obj in session.dirty and not get_history(obj, 'duracao').has_changes():
+                continue
+            _pending(session)['service_ids'].add(obj.id)
+        elif isinstance(obj, Schedule):
+            _pending(session)['weekdays'].update(_history_values(obj, 'dia_semana'))
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_invalidations(session):
+    pending = session.info.pop('availability_invalidate', None)
+    if pending:
+        availability_cache.invalidate(**pending)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_invalidations(session):
+    session.info.pop('availability_invalidate', None)
@@ -0,0 +1,258 @@
+# app/services/availability_engine.py
+
+from datetime import datetime, time, timedelta
+from functools import lru_cache
+
+from app import db
+from app.models.booking import Booking
+
+# Status que ocupam a agenda
+ACTIVE_STATUSES = ('Confirmado', 'Pendente')
+
+
+# =============================================================
+# CONVERSÕES (minutos desde 00:00)
+# =============================================================
+
+@lru_cache(maxsize=2048)
+def hhmm_to_minutes(value):
+    """Converte "HH:MM" em minutos desde a meia-noite (resultado em cache)."""
+    hours, minutes = value.split(':')
+    return int(hours) * 60 + int(minutes)
+
+
+def minutes_to_hhmm(value):
+    """Converte minutos desde a meia-noite em "HH:MM"."""
+    return f'{value // 60:02d}:{value % 60:02d}'
+
+
+def datetime_to_minutes(value):
+    """Minuto do dia de um datetime."""
+    return value.hour * 60 + value.minute
+
+
+def day_bounds(start_day, end_day=None):
+    """
+    Limites [início, fim) em datetime para os dias [start_day, end_day].
+    Usar como intervalo semiaberto mantém as consultas indexáveis
+    (ao contrário de func.date(coluna) == ...).
+    """
+    end_day = end_day or start_day
+    return (
+        datetime.combine(start_day, time.min),
+        datetime.combine(end_day + timedelta(days=1), time.min)
+    )
+
+
+# =============================================================
+# INTERVALOS OCUPADOS
+# =============================================================
+
+def merge_intervals(intervals):
+    """
+    Ordena e funde intervalos (inicio, fim) sobrepostos ou adjacentes.
+    Retorna uma lista ordenada e disjunta.
+    """
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+# =============================================================
+# GERAÇÃO DE SLOTS
+# =============================================================
+
+def schedule_windows(schedules):
+    """Converte blocos de Schedule em janelas (inicio, fim) ordenadas."""
+    return sorted(
+        (hhmm_to_minutes(s.hora_inicio), hhmm_to_minutes(s.hora_fim))
+        for s in schedules
+    )
+
+
+def build_slots(day, windows, busy, duration):
+    """
+    Gera os slots do dia percorrendo janelas e intervalos ocupados
+    em uma única varredura linear (ambos ordenados).
+    """
+    slots = []
+    if duration <= 0:
+        return slots
+
+    date_prefix = day.strftime('%Y-%m-%d')
+    pointer = 0
+    total_busy = len(busy)
+
+    for window_start, window_end in windows:
+        slot_start = window_start
+        while slot_start + duration <= window_end:
+            slot_end = slot_start + duration
+
+            # Descarta intervalos que já terminaram antes do slot
+            while pointer < total_busy and busy[pointer][1] <= slot_start:
+                pointer += 1
+
+            is_available = pointer >= total_busy or busy[pointer][0] >= slot_end
+            time_str = minutes_to_hhmm(slot_start)
+            slots.append({
+                'time': time_str,
+                'datetime_slot': f'{date_prefix} {time_str}',
+                'status': 'available' if is_available else 'unavailable'
+            })
+            slot_start = slot_end
+
+    return slots
+
+
+def build_slots_from_mask(day, windows, mask, duration):
+    """
+    Igual a build_slots, mas a partir do bitmap de ocupação do dia
+    (1 bit por minuto): cada slot é testado com um único AND.
+    """
+    slots = []
+    if duration <= 0:
+        return slots
+
+    date_prefix = day.strftime('%Y-%m-%d')
+    slot_bits = (1 << duration) - 1
+
+    for window_start, window_end in windows:
+        slot_start = window_start
+        while slot_start + duration <= window_end:
+            is_available = not (mask >> slot_start) & slot_bits
+            time_str = minutes_to_hhmm(slot_start)
+            slots.append({
+                'time': time_str,
+                'datetime_slot': f'{date_prefix} {time_str}',
+                'status': 'available' if is_available else 'unavailable'
+            })
+            slot_start += duration
+
+    return slots
+
+
+def build_slots_range(start_day, end_day, windows, masks, duration):
+    """
+    Slots de cada dia em [start_day, end_day] a partir das janelas por dia
+    da semana ({weekday: [(inicio, fim)]}) e dos bitmaps ({date: mask}).
+    """
+    result = {}
+    day = start_day
+    while day <= end_day:
+        result[day.strftime('%Y-%m-%d')] = build_slots_from_mask(
+            day,
+            windows.get(day.weekday(), []),
+            masks.get(day, 0),
+            duration
+        )
+        day += timedelta(days=1)
+    return result
+
+
+# =============================================================
+# COMANDO CLI (Benchmark)
+# =============================================================
+
+def _legacy_slots(day, schedules, bookings, duration):
+    """Algoritmo antigo (O(slots x agendamentos)), mantido só para comparação."""
+    unavailable = [(start, start + timedelta(minutes=d)) for start, d in bookings]
+    slots = []
+    for schedule in schedules:
+        current = datetime.combine(day, datetime.strptime(schedule.hora_inicio, '%H:%M').time())
+        end = datetime.combine(day, datetime.strptime(schedule.hora_fim, '%H:%M').time())
+        while current < end:
+            slot_end = current + timedelta(minutes=duration)
+            if slot_end > end:
+                break
+            available = True
+            for booked_start, booked_end in unavailable:
+                if current < booked_end and slot_end > booked_start:
+                    available = False
+                    break
+            slots.append({
+                'time': current.strftime('%H:%M'),
+                'datetime_slot': current.strftime('%Y-%m-%d %H:%M'),
+                'status': 'available' if available else 'unavailable'
+            })
+            current += timedelta(minutes=duration)
+    return slots
+
+
+def register_cli_commands(app):
+    import click
+    import random
+    import timeit
+    from types import SimpleNamespace
+
+    @app.cli.command("bench-availability")
+    @click.option('--bookings', default=1000, help='Agendamentos sintéticos no dia.')
+    @click.option('--duration', default=5, help='Duração do serviço (minutos).')
+    @click.option('--repeat', default=20, help='Repetições por algoritmo.')
+    def bench_availability(bookings, duration, repeat):
+        """Compara o cálculo de slots antigo com o motor de intervalos."""
+        day = datetime(2030, 1, 7).date()
+        schedules = [SimpleNamespace(hora_inicio='00:00', hora_fim='23:59')]
+        rng = random.Random(42)
+        raw = [
+            (datetime.combine(day, datetime.min.time()) + timedelta(minutes=rng.randrange(0, 1380)),
+             rng.choice((5, 10, 15, 30)))
+            for _ in range(bookings)
+        ]
+
+        def engine():
+            busy = merge_intervals(
+                (datetime_to_minutes(start), datetime_to_minutes(start) + d)
+                for start, d in raw
+            )
+            return build_slots(day, schedule_windows(schedules), busy, duration)
+
+        def legacy():
+            return _legacy_slots(day, schedules, raw, duration)
+
+        if engine() != legacy():
+            raise click.ClickException('Os algoritmos divergiram!')
+
+        legacy_time = min(timeit.repeat(legacy, number=1, repeat=repeat))
+        engine_time = min(timeit.repeat(engine, number=1, repeat=repeat))
+        click.echo(f"Agendamentos: {bookings} | slots: {len(engine())}")
+        click.echo(f"Antigo: {legacy_time * 1000:.2f} ms")
+        click.echo(f"Motor:  {engine_time * 1000:.2f} ms")
+        click.echo(f"Ganho:  {legacy_time / engine_time:.1f}x")
+
+    @app.cli.command("explain-availability")
+    def explain_availability():
+        """Mostra o plano (SQLite) das consultas de agendamento por faixa de datas."""
+        if db.engine.dialect.name != 'sqlite':
+            raise click.ClickException('Disponível apenas para SQLite.')
+
+        day_start, day_end = day_bounds(datetime.now().date())
+        queries = {
+            'disponibilidade do dia': db.session.query(Booking.id).filter(
+                Booking.data_agendamento >= day_start,
+                Booking.data_agendamento < day_end,
+                Booking.status.in_(ACTIVE_STATUSES),
+                Booking.deleted_at.is_(None)
+            ),
+            'meus agendamentos': db.session.query(Booking.id).filter(
+                Booking.user_id == 1,
+                Booking.deleted_at.is_(None)
+            ).order_by(Booking.data_agendamento.desc()),
+        }
+
+        full_scan = False
+        for name, query in queries.items():
+            compiled = query.statement.compile(db.engine, compile_kwargs={'literal_binds': True})
+            plan = db.session.execute(db.text(f'EXPLAIN QUERY PLAN {compiled}')).all()
+            click.echo(f"[{name}]")
+            for row in plan:
+                click.echo(f"  {row[-1]}")
+                if 'agendamento' in row[-1] and 'INDEX' not in row[-1]:
+                    full_scan = True
+
+        if full_scan:
+            raise click.ClickException('Consulta sem índice em agendamento.')
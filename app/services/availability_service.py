@@ -1,19 +1,117 @@
 # app/services/availability_service.py
-from app.models.schedule import Schedule
-from app.extensions.database import db
+import calendar
+from datetime import date, timedelta
+
+from app import db
+from app.models.occupancy import MINUTES_PER_DAY
+from app.models.service import Service
+from app.services import availability_engine, occupancy_service
+from app.services.schedule_template import schedule_template
+
 
 class AvailabilityService:
     @staticmethod
-    def get_available_schedules(service_id, desired_date=None):
-        """RF04 - Retorna horários disponíveis para um serviço e opcionalmente uma data."""
-        query = Schedule.query.filter_by(service_id=service_id, disponivel=True)
-        if desired_date:
-            query = query.filter_by(data=desired_date)
+    def get_available_schedules(service_id, desired_date):
+        """RF04 - Retorna os slots livres de um serviço na data informada."""
+        service = db.session.get(Service, service_id)
+        if service is None:
+            return []
 
-        return query.order_by(Schedule.data, Schedule.hora_inicio).all()
+        slots = availability_engine.build_slots_from_mask(
+            desired_date,
+            schedule_template.windows(desired_date.weekday()),
+            occupancy_service.get_day_mask(desired_date),
+            service.duracao
+        )
+        return [slot for slot in slots if slot['status'] == 'available']
 
     @staticmethod
     def check_for_conflict(user_id, date, service_id):
         """Verifica se há conflito de agendamento para o usuário nesta data/serviço."""
         # Lógica de verificação de conflito mais complexa pode entrar aqui
-        pass
\ No newline at end of file
+        pass
+
+    # =====================================================
+    # CAPACIDADE (MÊS INTEIRO)
+    # =====================================================
+
+    @staticmethod
+    def month_capacity(year, month, service_ids=None, slot_minutes=None):
+        """
+        Minutos de agenda, ocupados e livres e slots livres por serviço
+        em todos os dias do mês.
+
+        Cada dia já é uma grade de 1440 minutos (bitmap de 'ocupacao_dia'),
+        então o cálculo é feito com operações de bits sobre inteiros:
+        popcount para minutos e um AND por posição de slot, sem consultar
+        'agendamento'. 'slot_minutes' força o tamanho do slot (ex.: 60);
+        por padrão usa a duração de cada serviço.
+        """
+        first_day = date(year, month, 1)
+        last_day = date(year, month, calendar.monthrange(year, month)[1])
+
+        masks = occupancy_service.get_masks(first_day, last_day)
+        windows = schedule_template.windows_by_weekday()
+        window_masks = {
+            weekday: _windows_mask(items) for weekday, items in windows.items()
+        }
+
+        query = Service.query.order_by(Service.nome)
+        if service_ids:
+            query = query.filter(Service.id.in_(service_ids))
+        services = query.all()
+
+        # Minutos de agenda/ocupados não dependem do serviço: calcula por dia uma vez
+        days = []
+        scheduled_total = occupied_total = 0
+        day = first_day
+        while day <= last_day:
+            window_mask = window_masks.get(day.weekday(), 0)
+            mask = masks.get(day, 0)
+            scheduled = window_mask.bit_count()
+            occupied = (mask & window_mask).bit_count()
+            scheduled_total += scheduled
+            occupied_total += occupied
+            days.append((day, windows.get(day.weekday(), []), mask))
+            day += timedelta(days=1)
+
+        report = []
+        for service in services:
+            duration = slot_minutes or service.duracao
+            free_slots = sum(
+                _free_slots(day_windows, mask, duration) for _, day_windows, mask in days
+            )
+            report.append({
+                'service_id': service.id,
+                'nome': service.nome,
+                'slot_minutes': duration,
+                'free_slots': free_slots,
+            })
+
+        return {
+            'month': first_day.strftime('%Y-%m'),
+            'scheduled_minutes': scheduled_total,
+            'occupied_minutes': occupied_total,
+            'free_minutes': scheduled_total - occupied_total,
+            'services': report,
+        }
+
+
+def _windows_mask(windows):
+    mask = 0
+    for start, end in windows:
+        mask |= occupancy_service.interval_mask(start, end)
+    return mask
+
+
+def _free_slots(windows, mask, duration):
+    """Quantidade de slots livres (mesma grade de build_slots) em um dia."""
+    if duration <= 0 or duration > MINUTES_PER_DAY:
+        return 0
+    slot_bits = (1 << duration) - 1
+    free = 0
+    for window_start, window_end in windows:
+        for slot_start in range(window_start, window_end - duration + 1, duration):
+            if not (mask >> slot_start) & slot_bits:
+                free += 1
+    return free
@@ -0,0 +1,89 @@
+# app/services/backfill.py
+
+from sqlalchemy import inspect, select
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app import db
+from app.models.booking import Booking
+from app.models.counter import Counter
+from app.models.occupancy import DayOccupancy
+from app.models.schedule import Schedule
+from app.models.service import Service
+from app.models.user import User
+from app.models.utilization import UtilizationRollup
+from app.services import counter_service, occupancy_service, utilization_service
+
+
+# =============================================================
+# PREENCHIMENTO INICIAL DAS TABELAS DERIVADAS
+# =============================================================
+# Tabelas mantidas incrementalmente (bitmap de ocupação, contadores,
+# rollup de utilização) nascem vazias em um banco que já tem
+# agendamentos. Na partida, cada uma que estiver vazia com a origem
+# preenchida é reconstruída antes de o app atender requests; nas
+# partidas seguintes o custo é uma consulta por tabela.
+
+def _is_empty(model):
+    return db.session.execute(select(1).select_from(model).limit(1)).first() is None
+
+
+def _backfill_occupancy():
+    if not _is_empty(DayOccupancy) or _is_empty(Booking):
+        return False
+    occupancy_service.rebuild_all()
+    return True
+
+
+def _backfill_counters():
+    if not _is_empty(Counter):
+        return False
+    if all(_is_empty(model) for model in (Booking, Service, User, Schedule)):
+        return False
+    counter_service.recount()
+    return True
+
+
+def _backfill_utilization():
+    if not _is_empty(UtilizationRollup) or _is_empty(Booking):
+        return False
+    # Mesmo efeito de 'flask refresh-utilization --full', antes de atender requests
+    utilization_service.refresh(full=True)
+    return True
+
+
+# (nome, tabela derivada, função); a ordem é a de execução
+BACKFILLS = (
+    ('ocupação diária', DayOccupancy.__tablename__, _backfill_occupancy),
+    ('contadores do dashboard', Counter.__tablename__, _backfill_counters),
+    ('rollup de utilização', UtilizationRollup.__tablename__, _backfill_utilization),
+)
+
+
+def run_backfills(app):
+    """
+    Executa os preenchimentos pendentes (AUTO_BACKFILL). Ignora tabelas que
+    ainda não existem (banco antes do 'flask db upgrade'). Se outro processo
+    fizer o mesmo preenchimento ao mesmo tempo, a transação perdedora é
+    desfeita e a verificação é repetida.
+    """
+    if not app.config.get('AUTO_BACKFILL', True):
+        return
+
+    with app.app_context():
+        existing = set(inspect(db.engine).get_table_names())
+        if Booking.__tablename__ not in existing:
+            return
+
+        for label, table, backfill in BACKFILLS:
+            if table not in existing:
+                continue
+            for attempt in range(3):
+                try:
+                    if backfill():
+                        app.logger.warning(f"Preenchimento inicial de '{table}': {label} (tabela vazia em banco já populado).")
+                    break
+                except (IntegrityError, OperationalError):
+                    db.session.rollback()
+                    if attempt == 2:
+                        raise
+        db.session.remove()
@@ -0,0 +1,78 @@
+# app/services/booking_metrics.py
+
+from collections import Counter
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+
+from app.extensions.metrics import metrics
+from app.models.booking import Booking
+
+bookings_created = metrics.counter(
+    'bookings_created_total', 'Agendamentos criados.'
+)
+booking_status_changes = metrics.counter(
+    'booking_status_changes_total', 'Mudanças de status de agendamentos (confirmação, cancelamento...).',
+    ('status',)
+)
+bookings_deleted = metrics.counter(
+    'bookings_deleted_total', 'Agendamentos excluídos (soft delete).'
+)
+
+
+# =============================================================
+# CONTAGEM NO COMMIT
+# =============================================================
+# Como no cache de disponibilidade, os eventos são coletados no flush e
+# só contabilizados após o commit (transações desfeitas não contam).
+
+def _pending(session):
+    return session.info.setdefault('booking_metrics', Counter())
+
+
+def record_on_commit(session, created=0, statuses=None, deleted=0):
+    """
+    Agenda eventos para o próximo commit da sessão. Necessário para
+    escritas em lote (insert/update via Core) que não passam pelo flush.
+    'statuses' é {novo_status: quantidade}.
+    """
+    pending = _pending(session)
+    pending['created'] += created
+    pending['deleted'] += deleted
+    for status, n in (statuses or {}).items():
+        pending[('status', status)] += n
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_events(session, flush_context):
+    for obj in session.new:
+        if isinstance(obj, Booking):
+            _pending(session)['created'] += 1
+
+    for obj in session.dirty:
+        if not isinstance(obj, Booking):
+            continue
+        if get_history(obj, 'status').has_changes():
+            _pending(session)[('status', obj.status)] += 1
+        if obj.deleted_at is not None and get_history(obj, 'deleted_at').has_changes():
+            _pending(session)['deleted'] += 1
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_events(session):
+    pending = session.info.pop('booking_metrics', None)
+    if not pending:
+        return
+    for key, n in pending.items():
+        if key == 'created':
+            bookings_created.inc(n)
+        elif key == 'deleted':
+            bookings_deleted.inc(n)
+        elif n:
+            booking_status_changes.labels(key[1]).inc(n)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_events(session):
+    session.info.pop('booking_metrics', None)
@@ -1,23 +1,672 @@
 # app/services/booking_service.py
+import random
+import time
+from collections import Counter as Deltas, defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, insert, or_
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import joinedload
+
+from app import db
+from app.models.base import BaseMixin
 from app.models.booking import Booking
-from app.services.availability_service import AvailabilityService
-from app.extensions.database import db
+from app.models.service import Service
+from app.models.user import User
+from app.services import booking_metrics, counter_service, occupancy_service, utilization_service
+from app.services.availability_cache import invalidate_on_commit
+from app.services.availability_engine import ACTIVE_STATUSES, datetime_to_minutes, day_bounds
+from app.services.schedule_template import schedule_template
+
 
 class BookingConflictError(Exception):
     pass
 
+
+class InvalidSlotError(Exception):
+    pass
+
+
+class BookingBatchError(BookingConflictError):
+    """Lote recusado; 'report' traz o resultado de cada slot."""
+
+    def __init__(self, report):
+        super().__init__('Um ou mais horários do lote não estão disponíveis.')
+        self.report = report
+
+
+# Ação em lote -> (novo status, status de origem permitidos)
+STATUS_TRANSITIONS = {
+    'confirm': ('Confirmado', ('Pendente',)),
+    'cancel': ('Cancelado', ('Pendente', 'Confirmado')),
+}
+
+
 class BookingService:
+    # Tentativas quando outra transação altera o mesmo dia ao mesmo tempo
+    MAX_RETRIES = 8
+
+    @staticmethod
+    def resolve_slot(service, slot_datetime):
+        """
+        Bloco de trabalho e máscara de minutos do slot para o serviço.
+        Levanta InvalidSlotError se o serviço não existe ou o horário
+        está fora dos blocos cadastrados.
+        """
+        if service is None:
+            raise InvalidSlotError('Serviço não encontrado.')
+
+        slot_start = datetime_to_minutes(slot_datetime)
+        schedule_id = schedule_template.find(slot_datetime.weekday(), slot_start)
+        if schedule_id is None:
+            raise InvalidSlotError(
+                'O horário selecionado não corresponde a um bloco de trabalho válido.'
+            )
+        return schedule_id, occupancy_service.booking_mask(slot_datetime, service.duracao)
+
+    @staticmethod
+    def create_booking(user_id, service_id, slot_datetime):
+        """
+        RF05, RF06 - Cria um agendamento 'Pendente' sem risco de reserva dupla.
+
+        Os minutos do slot são reservados no bitmap de 'ocupacao_dia' com
+        compare-and-swap na mesma transação do INSERT; se outra transação
+        alterou o dia no meio do caminho, a transação inteira é refeita.
+        Levanta InvalidSlotError ou BookingConflictError.
+        """
+        schedule_id, mask = BookingService.resolve_slot(
+            db.session.get(Service, service_id), slot_datetime
+        )
+        day = slot_datetime.date()
+
+        for attempt in range(BookingService.MAX_RETRIES):
+            try:
+                if not occupancy_service.claim(day, mask):
+                    db.session.rollback()
+                    raise BookingConflictError('Este horário já está ocupado.')
+
+                new_booking = Booking(
+                    user_id=user_id,
+                    service_id=service_id,
+                    data_agendamento=slot_datetime,
+                    status='Pendente',
+                    schedule_id=schedule_id
+                )
+                new_booking._occupancy_claimed = True
+                db.session.add(new_booking)
+                db.session.commit()
+                return new_booking
+
+            except (occupancy_service.OccupancyChanged, OperationalError):
+                # Disputa pelo mesmo dia (ou banco bloqueado): refaz do zero
+                db.session.rollback()
+                time.sleep(random.uniform(0, 0.005 * (2 ** attempt)))
+
+        raise BookingConflictError('Horário muito disputado. Tente novamente.')
+
+    # Máximo de slots aceitos em um único lote
+    MAX_BATCH_SIZE = 100
+
+    @staticmethod
+    def recurring_slots(first_slot, occurrences, interval_days=7):
+        """Datas de uma série recorrente (ex.: semanal por N semanas)."""
+        return [first_slot + timedelta(days=interval_days * i) for i in range(occurrences)]
+
+    @staticmethod
+    def create_bookings(user_id, service_id, slot_datetimes):
+        """
+        Cria vários agendamentos 'Pendente' de uma vez, tudo ou nada.
+
+        Os bitmaps de todos os dias envolvidos são lidos em uma única
+        consulta por faixa, os conflitos (inclusive entre slots do próprio
+        lote) são apurados em memória, os dias são reservados com
+        compare-and-swap e as linhas entram com um único INSERT em lote e
+        um único commit.
+
+        Retorna o relatório por slot; levanta BookingBatchError (com o
+        relatório) se qualquer slot for inválido ou estiver ocupado.
+        """
+        service = db.session.get(Service, service_id)
+        if service is None:
+            raise InvalidSlotError('Serviço não encontrado.')
+
+        slots = sorted(set(slot_datetimes))
+        if not slots:
+            raise InvalidSlotError('Nenhum horário informado.')
+        if len(slots) > BookingService.MAX_BATCH_SIZE:
+            raise InvalidSlotError(f'Máximo de {BookingService.MAX_BATCH_SIZE} horários por lote.')
+
+        # 1. Validação e sobreposição dentro do próprio lote
+        report = []
+        entries = []
+        batch_masks = defaultdict(int)
+        for slot in slots:
+            item = {'datetime_slot': slot.strftime('%Y-%m-%d %H:%M'), 'status': 'ok'}
+            report.append(item)
+
+            schedule_id = schedule_template.find(slot.weekday(), datetime_to_minutes(slot))
+            if schedule_id is None:
+                item.update(status='invalid', reason='Fora de um bloco de trabalho.')
+                continue
+
+            mask = occupancy_service.booking_mask(slot, service.duracao)
+            if batch_masks[slot.date()] & mask:
+                item.update(status='conflict', reason='Sobrepõe outro horário do lote.')
+                continue
+
+            batch_masks[slot.date()] |= mask
+            entries.append((item, slot, mask, schedule_id))
+
+        rows = [
+            {
+                'user_id': user_id,
+                'service_id': service_id,
+                'data_agendamento': slot,
+                'status': 'Pendente',
+                'schedule_id': schedule_id
+            }
+            for _, slot, _, schedule_id in entries
+        ]
+
+        for attempt in range(BookingService.MAX_RETRIES):
+            try:
+                # 2. Ocupação atual de todos os dias do lote (uma consulta)
+                current = occupancy_service.get_masks(slots[0].date(), slots[-1].date())
+
+                for item, slot, mask, _ in entries:
+                    if current.get(slot.date(), 0) & mask:
+                        item.update(status='conflict', reason='Horário já ocupado.')
+                if any(item['status'] != 'ok' for item in report):
+                    db.session.rollback()
+                    raise BookingBatchError(report)
+
+                # 3. Reserva dos dias (compare-and-swap) + INSERT em lote
+                for day, mask in batch_masks.items():
+                    old_mask = current.get(day, 0)
+                    occupancy_service.swap(day, old_mask, old_mask | mask, exists=day in current)
+
+                db.session.execute(insert(Booking), rows)
+                counter_service.record_bookings(rows)
+                utilization_service.mark_days(db.session, batch_masks.keys())
+                invalidate_on_commit(db.session, days=batch_masks.keys())
+                booking_metrics.record_on_commit(db.session, created=len(rows))
+                db.session.commit()
+                return report
+
+            except (occupancy_service.OccupancyChanged, OperationalError):
+                db.session.rollback()
+                time.sleep(random.uniform(0, 0.005 * (2 ** attempt)))
+
+        raise BookingConflictError('Horários muito disputados. Tente novamente.')
+
+    # =====================================================
+    # CONFIRMAÇÃO / CANCELAMENTO EM LOTE
+    # =====================================================
+
+    MAX_BULK_SIZE = 1000
+
     @staticmethod
-    def create_booking(user_id, service_id, schedule_id):
-        # RF05, RF06 - Lógica de Criação e Transação
-        
-        # 1. Validação de Conflito usando o AvailabilityService
-        # ... lógica de verificação ...
-        
-        # 2. Criação
-        # ... new_booking.save() ...
-        pass
-        
+    def bulk_update_status(action, ids=None, **filters):
+        """
+        Confirma ou cancela vários agendamentos (por ids ou pelos filtros do
+        painel) com um UPDATE por status de origem, condicionado ao status
+        atual: uma alteração concorrente nunca é sobrescrita.
+
+        UPDATE via Core não passa pelo flush, então contadores, ocupação,
+        rollup de utilização e cache são ajustados aqui, na mesma transação.
+        Retorna {id: {'outcome': 'updated'|'skipped'|'not_found', 'status': ...}}.
+        Levanta ValueError para ação/seleção inválida.
+        """
+        if action not in STATUS_TRANSITIONS:
+            raise ValueError(f"Ação inválida: {action}.")
+        new_status, allowed = STATUS_TRANSITIONS[action]
+
+        query = db.session.query(
+            Booking.id, Booking.status, Booking.data_agendamento, Booking.deleted_at
+        )
+        if ids is not None:
+            ids = set(ids)
+            if len(ids) > BookingService.MAX_BULK_SIZE:
+                raise ValueError(f'Máximo de {BookingService.MAX_BULK_SIZE} agendamentos por lote.')
+            query = query.filter(Booking.id.in_(ids))
+        elif any(value for key, value in filters.items() if key != 'include_deleted'):
+            query = BookingService.filter_bookings(query, **filters).limit(BookingService.MAX_BULK_SIZE + 1)
+        else:
+            raise ValueError('Informe os ids ou ao menos um filtro.')
+
+        rows = query.all()
+        if len(rows) > BookingService.MAX_BULK_SIZE:
+            raise ValueError(f'O filtro seleciona mais de {BookingService.MAX_BULK_SIZE} agendamentos.')
+
+        results = {booking_id: {'outcome': 'not_found', 'status': None} for booking_id in ids or ()}
+        candidates = defaultdict(dict)  # status de origem -> {id: data_agendamento}
+        for booking_id, status, start, deleted_at in rows:
+            if deleted_at is not None:
+                results[booking_id] = {'outcome': 'not_found', 'status': None}
+            elif status not in allowed:
+                results[booking_id] = {'outcome': 'skipped', 'status': status}
+            else:
+                candidates[status][booking_id] = start
+
+        table = Booking.__table__
+        deltas = Deltas()
+        days = set()
+        try:
+            for old_status, starts in candidates.items():
+                stmt = (
+                    table.update()
+                    .where(
+                        table.c.id.in_(list(starts)),
+                        table.c.status == old_status,
+                        table.c.deleted_at.is_(None)
+                    )
+                    .values(status=new_status)
+                )
+                if db.session.get_bind().dialect.update_returning:
+                    updated = db.session.execute(stmt.returning(table.c.id)).scalars().all()
+                else:
+                    db.session.execute(stmt)
+                    updated = db.session.execute(
+                        db.select(table.c.id).where(
+                            table.c.id.in_(list(starts)), table.c.status == new_status
+                        )
+                    ).scalars().all()
+
+                for booking_id in updated:
+                    start = starts[booking_id]
+                    deltas.subtract(counter_service.booking_keys(old_status, start, None))
+                    deltas.update(counter_service.booking_keys(new_status, start, None))
+                    days.add(start.date())
+                    results[booking_id] = {'outcome': 'updated', 'status': new_status}
+                # Alterados por outra transação entre a leitura e o UPDATE
+                for booking_id in set(starts) - set(updated):
+                    results[booking_id] = {'outcome': 'skipped', 'status': None}
+
+            conn = db.session.connection()
+            counter_service.apply_deltas(conn, deltas)
+            if new_status not in ACTIVE_STATUSES and days:
+                # Agendamentos desativados liberam minutos: bitmap, rollup e cache
+                occupancy_service.recompute_days(conn, days)
+                utilization_service.mark_days(db.session, days)
+                invalidate_on_commit(db.session, days=days)
+            booking_metrics.record_on_commit(db.session, statuses={
+                new_status: sum(1 for r in results.values() if r['outcome'] == 'updated')
+            })
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        return results
+
     @staticmethod
     def get_user_bookings(user_id):
-        return Booking.query.filter_by(user_id=user_id).all()
\ No newline at end of file
+        return Booking.query.filter_by(user_id=user_id).all()
+
+    # =====================================================
+    # LISTAGEM ADMINISTRATIVA (filtros + paginação por cursor)
+    # =====================================================
+
+    @staticmethod
+    def filter_bookings(query, status=None, service_id=None, user_id=None,
+                        date_from=None, date_to=None, include_deleted=False):
+        """
+        Aplica os filtros do painel administrativo (datas inclusivas).
+        include_deleted=True (auditoria) traz também os excluídos.
+        """
+        if include_deleted:
+            query = query.execution_options(include_deleted=True)
+        if status:
+            query = query.filter(Booking.status == status)
+        if service_id:
+            query = query.filter(Booking.service_id == service_id)
+        if user_id:
+            query = query.filter(Booking.user_id == user_id)
+        if date_from:
+            query = query.filter(Booking.data_agendamento >= day_bounds(date_from)[0])
+        if date_to:
+            query = query.filter(Booking.data_agendamento < day_bounds(date_to)[1])
+        return query
+
+    @staticmethod
+    def encode_cursor(booking):
+        return f"{booking.data_agendamento.strftime('%Y-%m-%dT%H:%M:%S')}_{booking.id}"
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """Cursor 'YYYY-MM-DDTHH:MM:SS_id'; ValueError se inválido."""
+        moment, booking_id = cursor.rsplit('_', 1)
+        return datetime.strptime(moment, '%Y-%m-%dT%H:%M:%S'), int(booking_id)
+
+    @staticmethod
+    def list_bookings(after=None, limit=50, **filters):
+        """
+        Página de agendamentos (mais recentes primeiro) por keyset em
+        (data_agendamento, id): custo constante em qualquer página, ao
+        contrário de OFFSET. Serviço, cliente e bloco vêm no mesmo SELECT.
+        Retorna (agendamentos, cursor_da_próxima_página ou None).
+        """
+        query = BookingService.filter_bookings(
+            Booking.query.options(
+                joinedload(Booking.servico),
+                joinedload(Booking.user),
+                joinedload(Booking.schedule_slot)
+            ),
+            **filters
+        )
+
+        if after:
+            moment, booking_id = BookingService.decode_cursor(after)
+            query = query.filter(or_(
+                Booking.data_agendamento < moment,
+                and_(Booking.data_agendamento == moment, Booking.id < booking_id)
+            ))
+
+        items = (
+            query.order_by(Booking.data_agendamento.desc(), Booking.id.desc())
+            .limit(limit + 1)
+            .all()
+        )
+        next_cursor = BookingService.encode_cursor(items[limit - 1]) if len(items) > limit else None
+        return items[:limit], next_cursor
+
+
+# =============================================================
+# EXPORTAÇÃO EM STREAMING (CSV / NDJSON)
+# =============================================================
+
+EXPORT_COLUMNS = (
+    'id', 'data_agendamento', 'status', 'servico', 'duracao',
+    'cliente', 'email', 'deleted_at'
+)
+EXPORT_CHUNK_SIZE = 1000
+
+
+def export_rows(**filters):
+    """
+    Gera as linhas de exportação (agendamento + serviço + cliente) em
+    blocos de EXPORT_CHUNK_SIZE via yield_per: a memória fica constante
+    independentemente do número de agendamentos.
+    """
+    query = (
+        db.session.query(
+            Booking.id, Booking.data_agendamento, Booking.status,
+            Service.nome, Service.duracao,
+            User.nome, User.email, Booking.deleted_at
+        )
+        .join(Service, Booking.service_id == Service.id)
+        .join(User, Booking.user_id == User.id)
+    )
+    query = BookingService.filter_bookings(query, **filters)
+    yield from (
+        query.order_by(Booking.data_agendamento, Booking.id)
+        .yield_per(EXPORT_CHUNK_SIZE)
+    )
+
+
+def _format_value(value):
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return value
+
+
+def iter_csv(rows):
+    """Linhas CSV (com cabeçalho) em blocos de EXPORT_CHUNK_SIZE registros."""
+    import csv
+    import io
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        return value
+
+    writer.writerow(EXPORT_COLUMNS)
+    for count, row in enumerate(rows, start=1):
+        writer.writerow([_format_value(v) for v in row])
+        if count % EXPORT_CHUNK_SIZE == 0:
+            yield flush()
+    tail = flush()
+    if tail:
+        yield tail
+
+
+def iter_ndjson(rows):
+    """Um objeto JSON por linha (NDJSON), em blocos de EXPORT_CHUNK_SIZE linhas."""
+    import json
+
+    lines = []
+    for row in rows:
+        record = dict(zip(EXPORT_COLUMNS, (_format_value(v) for v in row)))
+        lines.append(json.dumps(record, ensure_ascii=False) + '\n')
+        if len(lines) == EXPORT_CHUNK_SIZE:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
+
+
+EXPORT_FORMATS = {
+    'csv': (iter_csv, 'text/csv'),
+    'ndjson': (iter_ndjson, 'application/x-ndjson'),
+}
+
+
+# =============================================================
+# COMANDOS CLI (Teste de estresse / Exportação)
+# =============================================================
+
+def register_cli_commands(app):
+    import click
+    import os
+    import tempfile
+    import threading
+
+    @app.cli.command("stress-booking")
+    @click.option('--threads', default=16, help='Threads concorrentes.')
+    @click.option('--attempts', default=50, help='Tentativas de agendamento por thread.')
+    @click.option('--slots', default=20, type=click.IntRange(1, 40), help='Slots de 30 min disputados.')
+    def stress_booking(threads, attempts, slots):
+        """
+        Dispara agendamentos concorrentes nos mesmos slots (banco SQLite
+        temporário) e verifica que nenhum minuto foi reservado duas vezes.
+        """
+        from app import create_app
+        from app.config.config import Config
+        from app.models.schedule import Schedule
+        from app.models.user import User
+
+        tmp_dir = tempfile.mkdtemp()
+
+        class StressConfig(Config):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tmp_dir, 'stress.db')}"
+
+        stress_app = create_app(StressConfig)
+        day = (datetime.now() + timedelta(days=1)).date()
+
+        with stress_app.app_context():
+            db.create_all()
+            user = User(nome='Stress', email='stress@sistema.com')
+            user.set_password('stress')
+            service = Service(nome='Stress', duracao=30)
+            schedule = Schedule(dia_semana=day.weekday(), hora_inicio='03:00', hora_fim='23:30')
+            with BaseMixin.unit_of_work():
+                user.save()
+                service.save()
+                schedule.save()
+            user_id, service_id = user.id, service.id
+
+        # Slots de 30 min a partir das 03:00, disputados por todas as threads
+        slots = [datetime.combine(day, datetime.min.time()) + timedelta(hours=3, minutes=30 * i)
+                 for i in range(slots)]
+        outcome = {'created': 0, 'conflicts': 0, 'errors': 0}
+        lock = threading.Lock()
+
+        def worker(seed):
+            rng = random.Random(seed)
+            with stress_app.app_context():
+                for _ in range(attempts):
+                    try:
+                        BookingService.create_booking(user_id, service_id, rng.choice(slots))
+                        key = 'created'
+                    except BookingConflictError:
+                        key = 'conflicts'
+                    except Exception:
+                        db.session.rollback()
+                        key = 'errors'
+                    with lock:
+                        outcome[key] += 1
+
+        started = time.perf_counter()
+        pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+        elapsed = time.perf_counter() - started
+
+        with stress_app.app_context():
+            starts = [b.data_agendamento for b in Booking.query.order_by(Booking.data_agendamento)]
+        doubles = sum(1 for a, b in zip(starts, starts[1:]) if b - a < timedelta(minutes=30))
+
+        total = threads * attempts
+        click.echo(f"Tentativas: {total} em {elapsed:.2f}s ({total / elapsed:.0f}/s)")
+        click.echo(f"Criados: {outcome['created']} ({outcome['created'] / elapsed:.0f} agendamentos/s) | "
+                   f"Conflitos: {outcome['conflicts']} | Erros: {outcome['errors']}")
+        click.echo(f"Reservas duplas: {doubles}")
+        if doubles:
+            raise SystemExit(1)
+
+    @app.cli.command("export-bookings")
+    @click.option('--format', 'fmt', type=click.Choice(sorted(EXPORT_FORMATS)), default='csv')
+    @click.option('--output', type=click.File('w', encoding='utf-8'), default='-',
+                  help='Arquivo de saída (padrão: stdout).')
+    @click.option('--status', default=None)
+    @click.option('--date-from', type=click.DateTime(['%Y-%m-%d']), default=None)
+    @click.option('--date-to', type=click.DateTime(['%Y-%m-%d']), default=None)
+    def export_bookings(fmt, output, status, date_from, date_to):
+        """Exporta agendamentos (com serviço e cliente) em CSV ou NDJSON."""
+        rows = export_rows(
+            status=status,
+            date_from=date_from.date() if date_from else None,
+            date_to=date_to.date() if date_to else None
+        )
+        serializer, _ = EXPORT_FORMATS[fmt]
+        for chunk in serializer(rows):
+            output.write(chunk)
+
+    @app.cli.command("purge-bookings")
+    @click.option('--status', default='Cancelado', show_default=True)
+    @click.option('--before', type=click.DateTime(['%Y-%m-%d']), required=True,
+                  help='Exclui agendamentos anteriores a esta data.')
+    @click.option('--dry-run', is_flag=True, help='Apenas conta, sem excluir.')
+    def purge_bookings(status, before, dry_run):
+        """Exclusão lógica em lote (uma transação) de agendamentos antigos."""
+        ids = db.session.execute(
+            db.select(Booking.id).where(
+                Booking.status == status,
+                Booking.data_agendamento < before,
+                Booking.deleted_at.is_(None)
+            )
+        ).scalars().all()
+        if dry_run:
+            click.echo(f"{len(ids)} agendamento(s) seriam excluídos.")
+            return
+        deleted = Booking.soft_delete_by_ids(ids, deleted_reason='Limpeza via CLI')
+        click.echo(f"{len(deleted)} agendamento(s) excluído(s).")
+
+    @app.cli.command("check-bookings-queries")
+    @click.option('--bookings', default=300, show_default=True, help='Agendamentos no banco temporário.')
+    @click.option('--per-page', default=50, show_default=True, help='Itens por página da listagem.')
+    def check_bookings_queries(bookings, per_page):
+        """
+        Conta as consultas SQL de /admin/bookings (banco SQLite temporário,
+        vários serviços e clientes) com um e com muitos agendamentos, na
+        primeira e na página seguinte. Falha se o número variar (N+1).
+        """
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+
+        from app import create_app
+        from app.config.config import TestingConfig
+        from app.models.schedule import Schedule
+
+        tmp_dir = tempfile.mkdtemp()
+
+        class CheckConfig(TestingConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tmp_dir, 'queries.db')}"
+            SQL_PROFILER_ENABLED = False
+            METRICS_ENABLED = False
+
+        check_app = create_app(CheckConfig)
+        with check_app.app_context():
+            db.create_all()
+            admin = User(nome='Admin', email='admin@sistema.com', perfil='Administrador')
+            admin.set_password('admin')
+            clients = [User(nome=f'Cliente {i}', email=f'cliente{i}@sistema.com') for i in range(per_page)]
+            for client in clients:
+                client.set_password('cliente')
+            services = [Service(nome=f'Serviço {i}', duracao=30) for i in range(4)]
+            schedules = [Schedule(dia_semana=d, hora_inicio='08:00', hora_fim='18:00') for d in range(7)]
+            BaseMixin.save_all([admin, *clients, *services, *schedules])
+            client_ids = [client.id for client in clients]
+            service_ids = [service.id for service in services]
+            schedule_ids = {schedule.dia_semana: schedule.id for schedule in schedules}
+
+        def seed(total):
+            # 20 agendamentos de 30 min por dia, alternando serviço e cliente
+            start = datetime.combine(datetime.now().date() + timedelta(days=1), datetime.min.time())
+            with check_app.app_context():
+                existing = Booking.query.count()
+                slots = [
+                    start + timedelta(days=i // 20, hours=8, minutes=30 * (i % 20))
+                    for i in range(existing, total)
+                ]
+                BaseMixin.save_all([
+                    Booking(
+                        user_id=client_ids[i % len(client_ids)],
+                        service_id=service_ids[i % len(service_ids)],
+                        data_agendamento=slot,
+                        status='Pendente',
+                        schedule_id=schedule_ids[slot.weekday()]
+                    )
+                    for i, slot in enumerate(slots, start=existing)
+                ])
+
+        client = check_app.test_client()
+        client.post('/auth/login', data={'email': 'admin@sistema.com', 'senha': 'admin'})
+
+        def count(url):
+            statements = []
+
+            def record(conn, cursor, statement, parameters, context, executemany):
+                statements.append(statement)
+
+            event.listen(Engine, 'before_cursor_execute', record)
+            try:
+                response = client.get(url)
+            finally:
+                event.remove(Engine, 'before_cursor_execute', record)
+            if response.status_code != 200:
+                raise click.ClickException(f'{url} respondeu {response.status_code}.')
+            return len(statements)
+
+        url = f'/admin/bookings?per_page={per_page}'
+        client.get(url)  # aquece caches (usuário logado etc.) antes de medir
+        results = {}
+        # 1 agendamento x vários serviços/clientes por página: um N+1 muda a contagem
+        for total in (1, bookings):
+            seed(total)
+            results[f'{total} agendamentos, página 1'] = count(url)
+            with check_app.app_context():
+                _, cursor = BookingService.list_bookings(limit=per_page)
+            if cursor:
+                results[f'{total} agendamentos, página 2'] = count(f'{url}&after={cursor}')
+
+        for label, queries in results.items():
+            click.echo(f"{label}: {queries} consulta(s)")
+        if len(set(results.values())) != 1:
+            raise click.ClickException('Número de consultas varia com a quantidade de agendamentos (N+1).')
@@ -0,0 +1,192 @@
+# app/services/counter_service.py
+
+from collections import Counter as Deltas
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+
+from app import db
+from app.models.booking import Booking
+from app.models.counter import Counter
+from app.models.schedule import Schedule
+from app.models.service import Service
+from app.models.user import User
+
+# Entidades contadas apenas pelo total (insert/delete)
+TOTAL_KEYS = {Service: 'servico', User: 'usuario', Schedule: 'schedule'}
+
+
+# =============================================================
+# CHAVES
+# =============================================================
+
+def status_key(status):
+    return f'agendamento:status:{status}'
+
+
+def day_key(day):
+    return f"agendamento:data:{day.strftime('%Y-%m-%d')}"
+
+
+def booking_keys(status, start, deleted_at):
+    """Chaves incrementadas por um agendamento (nenhuma se estiver excluído)."""
+    if deleted_at is not None:
+        return []
+    return ['agendamento', status_key(status), day_key(start)]
+
+
+# =============================================================
+# LEITURA
+# =============================================================
+
+def get_counters(keys):
+    """Valores das chaves pedidas em uma única consulta (0 se ausente)."""
+    rows = db.session.execute(
+        select(Counter.chave, Counter.valor).where(Counter.chave.in_(keys))
+    ).all()
+    values = dict.fromkeys(keys, 0)
+    values.update(rows)
+    return values
+
+
+# =============================================================
+# ESCRITA (incrementos atômicos via Core)
+# =============================================================
+
+def apply_deltas(conn, deltas):
+    """Soma os deltas ({chave: n}) na tabela 'contador' com upsert."""
+    table = Counter.__table__
+    dialect = conn.dialect.name
+
+    for key, delta in deltas.items():
+        if not delta:
+            continue
+
+        if dialect in ('sqlite', 'postgresql'):
+            if dialect == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert
+            stmt = insert(table).values(chave=key, valor=delta)
+            conn.execute(stmt.on_conflict_do_update(
+                index_elements=[table.c.chave],
+                set_={'valor': table.c.valor + delta}
+            ))
+        else:
+            result = conn.execute(
+                table.update().where(table.c.chave == key).values(valor=table.c.valor + delta)
+            )
+            if result.rowcount == 0:
+                conn.execute(table.insert().values(chave=key, valor=delta))
+
+
+def record_bookings(rows):
+    """Contabiliza agendamentos inseridos em lote (INSERT via Core, sem flush)."""
+    deltas = Deltas()
+    for row in rows:
+        deltas.update(booking_keys(row['status'], row['data_agendamento'], row.get('deleted_at')))
+    apply_deltas(db.session.connection(), deltas)
+
+
+def _old_value(obj, attr):
+    history = get_history(obj, attr)
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(obj, attr)
+
+
+@event.listens_for(Session, 'after_flush')
+def _update_counters(session, flush_context):
+    deltas = Deltas()
+
+    for obj in session.new:
+        if isinstance(obj, Booking):
+            deltas.update(booking_keys(obj.status, obj.data_agendamento, obj.deleted_at))
+        elif type(obj) in TOTAL_KEYS:
+            deltas[TOTAL_KEYS[type(obj)]] += 1
+
+    for obj in session.dirty:
+        if isinstance(obj, Booking):
+            deltas.subtract(booking_keys(
+                _old_value(obj, 'status'),
+                _old_value(obj, 'data_agendamento'),
+                _old_value(obj, 'deleted_at')
+            ))
+            deltas.update(booking_keys(obj.status, obj.data_agendamento, obj.deleted_at))
+
+    for obj in session.deleted:
+        if isinstance(obj, Booking):
+            deltas.subtract(booking_keys(
+                _old_value(obj, 'status'),
+                _old_value(obj, 'data_agendamento'),
+                _old_value(obj, 'deleted_at')
+            ))
+        elif type(obj) in TOTAL_KEYS:
+            deltas[TOTAL_KEYS[type(obj)]] -= 1
+
+    if any(deltas.values()):
+        apply_deltas(session.connection(), deltas)
+
+
+# =============================================================
+# RECONTAGEM COMPLETA
+# =============================================================
+
+def recount(dry_run=False):
+    """
+    Recalcula todos os contadores a partir das tabelas de origem.
+    Retorna {chave: (armazenado, esperado)} das chaves divergentes.
+    """
+    expected = Deltas()
+    for model, key in TOTAL_KEYS.items():
+        expected[key] = db.session.query(db.func.count(model.id)).scalar()
+
+    live = Booking.deleted_at.is_(None)
+    expected['agendamento'] = db.session.query(db.func.count(Booking.id)).filter(live).scalar()
+    for status, total in (
+        db.session.query(Booking.status, db.func.count(Booking.id))
+        .filter(live).group_by(Booking.status)
+    ):
+        expected[status_key(status)] = total
+    for start, in db.session.query(Booking.data_agendamento).filter(live):
+        expected[day_key(start)] += 1
+
+    stored = dict(db.session.execute(select(Counter.chave, Counter.valor)).all())
+    drift = {
+        key: (stored.get(key, 0), expected.get(key, 0))
+        for key in set(stored) | set(expected)
+        if stored.get(key, 0) != expected.get(key, 0)
+    }
+
+    if not dry_run:
+        db.session.execute(Counter.__table__.delete())
+        rows = [{'chave': key, 'valor': value} for key, value in expected.items() if value]
+        if rows:
+            db.session.execute(Counter.__table__.insert(), rows)
+        db.session.commit()
+
+    return drift
+
+
+# =============================================================
+# COMANDO CLI
+# =============================================================
+
+def register_cli_commands(app):
+    import click
+
+    @app.cli.command("recount-counters")
+    @click.option('--check', is_flag=True, help='Apenas verifica divergências, sem gravar.')
+    def recount_counters(check):
+        """Recalcula os contadores do dashboard e mostra as divergências."""
+        drift = recount(dry_run=check)
+        for key in sorted(drift):
+            stored, expected = drift[key]
+            click.echo(f"{key}: armazenado={stored} esperado={expected}")
+        if check:
+            click.echo(f"{len(drift)} contador(es) divergente(s).")
+            if drift:
+                raise SystemExit(1)
+        else:
+            click.echo(f"Contadores recalculados ({len(drift)} corrigido(s)).")
@@ -0,0 +1,333 @@
+# app/services/occupancy_service.py
+
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import event, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+
+from app import db
+from app.models.booking import Booking
+from app.models.occupancy import DayOccupancy, MINUTES_PER_DAY
+from app.models.service import Service
+from app.services.availability_engine import ACTIVE_STATUSES, datetime_to_minutes, day_bounds
+
+
+# =============================================================
+# BITMAPS
+# =============================================================
+
+def interval_mask(start, end):
+    """Máscara com os bits [start, end) ligados (limitada ao dia)."""
+    end = min(end, MINUTES_PER_DAY)
+    if end <= start:
+        return 0
+    return ((1 << (end - start)) - 1) << start
+
+
+def booking_mask(start_dt, duracao):
+    minute = datetime_to_minutes(start_dt)
+    return interval_mask(minute, minute + duracao)
+
+
+def get_day_mask(day):
+    """Bitmap de ocupação do dia (0 se o dia não tem agendamentos)."""
+    bitmap = db.session.execute(
+        select(DayOccupancy.bitmap).where(DayOccupancy.data == day)
+    ).scalar()
+    return DayOccupancy.decode(bitmap)
+
+
+def get_masks(start_day, end_day):
+    """Bitmaps de todos os dias em [start_day, end_day] com uma consulta."""
+    rows = db.session.execute(
+        select(DayOccupancy.data, DayOccupancy.bitmap)
+        .where(DayOccupancy.data >= start_day, DayOccupancy.data <= end_day)
+    ).all()
+    return {day: DayOccupancy.decode(bitmap) for day, bitmap in rows}
+
+
+# =============================================================
+# RESERVA ATÔMICA (compare-and-swap)
+# =============================================================
+
+class OccupancyChanged(Exception):
+    """O bitmap do dia mudou entre a leitura e a escrita; repetir a transação."""
+    pass
+
+
+def swap(day, old_mask, new_mask, exists=True, session=None):
+    """
+    Grava 'new_mask' no dia somente se o valor persistido ainda for
+    'old_mask' (compare-and-swap). Levanta OccupancyChanged caso contrário.
+    'session' permite usar outra sessão (ex.: a síncrona de uma AsyncSession).
+    """
+    session = session or db.session
+    table = DayOccupancy.__table__
+    values = {'bitmap': DayOccupancy.encode(new_mask), 'updated_at': datetime.utcnow()}
+    if not exists:
+        try:
+            session.execute(table.insert().values(data=day, **values))
+        except IntegrityError as e:
+            raise OccupancyChanged(day) from e
+        return
+
+    result = session.execute(
+        table.update()
+        .where(table.c.data == day, table.c.bitmap == DayOccupancy.encode(old_mask))
+        .values(**values)
+    )
+    if result.rowcount != 1:
+        raise OccupancyChanged(day)
+
+
+def claim(day, mask, session=None):
+    """
+    Liga os bits de 'mask' no dia somente se ainda estiverem livres.
+    O UPDATE é condicionado ao valor lido (compare-and-swap), então duas
+    transações concorrentes nunca reservam o mesmo minuto: a perdedora
+    recebe OccupancyChanged e deve refazer a transação.
+    Retorna False se algum minuto já estiver ocupado.
+    """
+    session = session or db.session
+    current = session.execute(
+        select(DayOccupancy.bitmap).where(DayOccupancy.data == day)
+    ).scalar()
+    old_mask = DayOccupancy.decode(current)
+
+    if old_mask & mask:
+        return False
+
+    swap(day, old_mask, old_mask | mask, exists=current is not None, session=session)
+    return True
+
+
+# =============================================================
+# CÁLCULO / PERSISTÊNCIA (via Core, seguro dentro de after_flush)
+# =============================================================
+
+def _compute_masks(conn, start_day, end_day):
+    """Recalcula os bitmaps de [start_day, end_day] a partir de 'agendamento'."""
+    range_start, range_end = day_bounds(start_day, end_day)
+    rows = conn.execute(
+        select(Booking.data_agendamento, Service.duracao)
+        .join(Service, Booking.service_id == Service.id)
+        .where(
+            Booking.data_agendamento >= range_start,
+            Booking.data_agendamento < range_end,
+            Booking.status.in_(ACTIVE_STATUSES),
+            Booking.deleted_at.is_(None)
+        )
+    ).all()
+    masks = defaultdict(int)
+    for start, duracao in rows:
+        masks[start.date()] |= booking_mask(start, duracao)
+    return masks
+
+
+def _write_mask(conn, day, mask):
+    table = DayOccupancy.__table__
+    values = {'bitmap': DayOccupancy.encode(mask), 'updated_at': datetime.utcnow()}
+    result = conn.execute(table.update().where(table.c.data == day).values(**values))
+    if result.rowcount == 0:
+        conn.execute(table.insert().values(data=day, **values))
+
+
+def _ensure_rows(conn, days):
+    """Cria (vazias) as linhas de 'ocupacao_dia' que ainda não existem."""
+    table = DayOccupancy.__table__
+    dialect = conn.dialect.name
+    values = [{'data': day, 'bitmap': DayOccupancy.encode(0), 'updated_at': datetime.utcnow()} for day in days]
+
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        conn.execute(insert(table).on_conflict_do_nothing(index_elements=[table.c.data]), values)
+        return
+
+    existing = set(conn.execute(select(table.c.data).where(table.c.data.in_(days))).scalars())
+    for row in values:
+        if row['data'] in existing:
+            continue
+        try:
+            with conn.begin_nested():
+                conn.execute(table.insert().values(**row))
+        except IntegrityError:
+            pass  # criada por outra transação nesse meio tempo
+
+
+def lock_days(conn, days):
+    """
+    Trava as linhas de 'ocupacao_dia' dos dias (SELECT ... FOR UPDATE,
+    criando as que faltam) e retorna {dia: máscara atual}.
+
+    Todo caminho que grava o bitmap sem compare-and-swap (recálculo,
+    adições do flush) trava os dias antes de ler 'agendamento' ou o
+    bitmap: um claim() concorrente espera o commit e seu compare-and-swap
+    falha (OccupancyChanged), em vez de ter os bits sobrescritos por um
+    valor calculado a partir de uma leitura antiga. A ordem fixa (por
+    data) evita deadlock entre transações que travam vários dias.
+    """
+    days = sorted(set(days))
+    if not days:
+        return {}
+    _ensure_rows(conn, days)
+    table = DayOccupancy.__table__
+    rows = conn.execute(
+        select(table.c.data, table.c.bitmap)
+        .where(table.c.data.in_(days))
+        .order_by(table.c.data)
+        .with_for_update()
+    ).all()
+    return {day: DayOccupancy.decode(bitmap) for day, bitmap in rows}
+
+
+def _recompute_locked(conn, days):
+    for day in days:
+        _write_mask(conn, day, _compute_masks(conn, day, day).get(day, 0))
+
+
+def recompute_days(conn, days):
+    """
+    Regrava o bitmap dos dias a partir de 'agendamento' (com os dias
+    travados, ver lock_days). Usado pelo flush e pelas escritas em lote
+    via Core (UPDATE/INSERT), que não passam por ele.
+    """
+    lock_days(conn, days)
+    _recompute_locked(conn, days)
+
+
+def _is_active(status, deleted_at):
+    return status in ACTIVE_STATUSES and deleted_at is None
+
+
+def _old_value(obj, attr):
+    history = get_history(obj, attr)
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(obj, attr)
+
+
+# =============================================================
+# MANUTENÇÃO INCREMENTAL (eventos de sessão)
+# =============================================================
+
+@event.listens_for(Session, 'after_flush')
+def _update_occupancy(session, flush_context):
+    """
+    Mantém 'ocupacao_dia' na mesma transação das escritas em Booking:
+    - agendamento ativado/criado: OR dos bits no dia;
+    - desativado, removido ou movido: recalcula apenas os dias afetados.
+    """
+    additions = defaultdict(int)
+    recompute = set()
+
+    for obj in session.new:
+        # Agendamentos criados via claim() já reservaram seus bits
+        if getattr(obj, '_occupancy_claimed', False):
+            continue
+        if isinstance(obj, Booking) and _is_active(obj.status, obj.deleted_at):
+            duracao = session.get(Service, obj.service_id).duracao
+            additions[obj.data_agendamento.date()] |= booking_mask(obj.data_agendamento, duracao)
+
+    for obj in session.dirty:
+        if isinstance(obj, Booking):
+            old_start = _old_value(obj, 'data_agendamento')
+            was_active = _is_active(_old_value(obj, 'status'), _old_value(obj, 'deleted_at'))
+            now_active = _is_active(obj.status, obj.deleted_at)
+            moved = (
+                old_start != obj.data_agendamento
+                or _old_value(obj, 'service_id') != obj.service_id
+            )
+
+            if was_active and (moved or not now_active):
+                recompute.add(old_start.date())
+                recompute.add(obj.data_agendamento.date())
+            elif now_active and not was_active:
+                duracao = session.get(Service, obj.service_id).duracao
+                additions[obj.data_agendamento.date()] |= booking_mask(obj.data_agendamento, duracao)
+
+        elif isinstance(obj, Service) and get_history(obj, 'duracao').has_changes():
+            # Duração alterada: todos os dias com agendamentos do serviço mudam
+            days = session.connection().execute(
+                select(Booking.data_agendamento).where(Booking.service_id == obj.id)
+            ).scalars()
+            recompute.update(d.date() for d in days)
+
+    for obj in session.deleted:
+        if isinstance(obj, Booking):
+            recompute.add(_old_value(obj, 'data_agendamento').date())
+
+    if not additions and not recompute:
+        return
+
+    conn = session.connection()
+    current = lock_days(conn, recompute | set(additions))
+    _recompute_locked(conn, recompute)
+    for day, mask in additions.items():
+        if day not in recompute:
+            _write_mask(conn, day, current[day] | mask)
+
+
+# =============================================================
+# RECONSTRUÇÃO COMPLETA
+# =============================================================
+
+def rebuild_all(dry_run=False):
+    """
+    Recalcula todos os bitmaps a partir de 'agendamento'.
+    Retorna a lista de dias cujo bitmap persistido divergia.
+    """
+    conn = db.session.connection()
+    bounds = conn.execute(
+        select(db.func.min(Booking.data_agendamento), db.func.max(Booking.data_agendamento))
+    ).one()
+
+    expected = {}
+    if bounds[0] is not None:
+        expected = _compute_masks(conn, bounds[0].date(), bounds[1].date())
+
+    stored = {
+        day: DayOccupancy.decode(bitmap)
+        for day, bitmap in conn.execute(select(DayOccupancy.data, DayOccupancy.bitmap))
+    }
+
+    drift = sorted(
+        day for day in set(expected) | set(stored)
+        if expected.get(day, 0) != stored.get(day, 0)
+    )
+
+    if not dry_run:
+        conn.execute(DayOccupancy.__table__.delete())
+        for day, mask in expected.items():
+            if mask:
+                _write_mask(conn, day, mask)
+        db.session.commit()
+
+    return drift
+
+
+# =============================================================
+# COMANDO CLI
+# =============================================================
+
+def register_cli_commands(app):
+    import click
+
+    @app.cli.command("rebuild-occupancy")
+    @click.option('--check', is_flag=True, help='Apenas verifica divergências, sem gravar.')
+    def rebuild_occupancy(check):
+        """Reconstrói os bitmaps de ocupação diária do zero."""
+        drift = rebuild_all(dry_run=check)
+        for day in drift:
+            click.echo(f"Divergência em {day.strftime('%Y-%m-%d')}")
+        if check:
+            click.echo(f"{len(drift)} dia(s) divergente(s).")
+            if drift:
+                raise SystemExit(1)
+        else:
+            click.echo(f"Ocupação reconstruída ({len(drift)} dia(s) corrigido(s)).")
@@ -0,0 +1,151 @@
+# app/services/password_hasher.py
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class PasswordHasherBusy(Exception):
+    """Pool de hash saturado: a operação não terminou dentro do timeout."""
+    pass
+
+
+class PasswordHasher:
+    """
+    Hash/verificação de senhas (Werkzeug) em um pool limitado de threads.
+
+    scrypt/pbkdf2 liberam o GIL durante o cálculo, então os demais
+    requests continuam sendo atendidos; o limite de workers impede que um
+    pico de logins/cadastros ocupe todos os núcleos. Os parâmetros vêm do
+    Config (PASSWORD_HASH_METHOD, ex.: 'scrypt:32768:8:1' ou
+    'pbkdf2:sha256:600000') e hashes antigos são refeitos no login.
+    """
+
+    def __init__(self, method='scrypt', workers=2, timeout=10):
+        self.method = method
+        self.workers = workers
+        self.timeout = timeout
+        self._method_id = None
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.method = app.config.get('PASSWORD_HASH_METHOD', self.method)
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', self.workers)
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', self.timeout)
+        self._method_id = None
+        self.shutdown()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix='password-hash'
+                )
+            return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+    # =====================================================
+    # OPERAÇÕES
+    # =====================================================
+
+    def _run(self, fn, *args):
+        """
+        Executa fn no pool esperando até self.timeout segundos. Se estourar,
+        cancela a tarefa (se ainda estiver na fila) e levanta
+        PasswordHasherBusy, que as rotas tratam como erro temporário.
+        """
+        future = self._pool().submit(fn, *args)
+        try:
+            return future.result(self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise PasswordHasherBusy(
+                f'Hash de senha não concluído em {self.timeout}s.'
+            ) from None
+
+    def hash(self, senha):
+        """Gera o hash com os parâmetros atuais (executado no pool)."""
+        return self._run(generate_password_hash, senha, self.method)
+
+    def verify(self, senha_hash, senha):
+        """Confere a senha contra o hash armazenado (executado no pool)."""
+        if not senha_hash or senha is None:
+            return False
+        return self._run(check_password_hash, senha_hash, senha)
+
+    def needs_rehash(self, senha_hash):
+        """True se o hash foi gerado com outro método/parâmetros."""
+        if self._method_id is None:
+            # Werkzeug expande 'scrypt' para 'scrypt:n:r:p': compara na forma gravada
+            self._method_id = self.hash('x').split('$', 1)[0]
+        return senha_hash.split('$', 1)[0] != self._method_id
+
+
+password_hasher = PasswordHasher()
+
+
+# =============================================================
+# BENCHMARK (CLI)
+# =============================================================
+
+def register_cli_commands(app):
+    import click
+    import statistics
+    import time
+
+    @app.cli.command("bench-login")
+    @click.option('--logins', default=40, show_default=True, help='Verificações de senha por modo.')
+    @click.option('--threads', default=8, show_default=True, help='Requests de login simultâneos.')
+    @click.option('--legacy-method', default='scrypt', show_default=True,
+                  help='Método usado antes (hash na thread do request).')
+    def bench_login(logins, threads, legacy_method):
+        """
+        Vazão de login e latência de requests leves concorrentes:
+        hash na thread do request (antes) x pool limitado (depois).
+        """
+        legacy_hash = generate_password_hash('senha', legacy_method)
+        current_hash = generate_password_hash('senha', password_hasher.method)
+
+        def run(verify):
+            stop = threading.Event()
+            probes = []
+
+            def probe():
+                # Simula requests leves competindo com o pico de logins
+                while not stop.is_set():
+                    start = time.perf_counter()
+                    sum(range(2000))
+                    probes.append(time.perf_counter() - start)
+                    time.sleep(0.001)
+
+            prober = threading.Thread(target=probe)
+            prober.start()
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as requests_pool:
+                list(requests_pool.map(lambda _: verify(), range(logins)))
+            elapsed = time.perf_counter() - start
+            stop.set()
+            prober.join()
+            probes.sort()
+            p95 = probes[int(len(probes) * 0.95) - 1] if probes else 0.0
+            return logins / elapsed, statistics.median(probes) if probes else 0.0, p95
+
+        modes = [
+            (f'antes  ({legacy_method}, thread do request)',
+             lambda: check_password_hash(legacy_hash, 'senha')),
+            (f'depois ({password_hasher.method}, pool de {password_hasher.workers})',
+             lambda: password_hasher.verify(current_hash, 'senha')),
+        ]
+        for label, verify in modes:
+            rate, median, p95 = run(verify)
+            click.echo(
+                f"{label}: {rate:.1f} logins/s | request leve "
+                f"mediana={median * 1000:.2f}ms p95={p95 * 1000:.2f}ms"
+            )
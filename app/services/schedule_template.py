@@ -0,0 +1,94 @@
+# app/services/schedule_template.py
+
+import threading
+import time
+from bisect import bisect_right
+
+from app import db
+from app.models.schedule import Schedule
+from app.services.availability_engine import hhmm_to_minutes
+
+
+class ScheduleTemplate:
+    """
+    Modelo semanal compilado a partir da tabela 'schedule':
+    por dia da semana, tuplas (inicio_min, fim_min, schedule_id) ordenadas.
+
+    A tabela é pequena e quase nunca muda, então é lida uma vez e só
+    recompilada após edições no admin (invalidate) ou ao expirar o TTL
+    (que cobre edições feitas por outros processos).
+    """
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._compiled = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.ttl = app.config.get('SCHEDULE_TEMPLATE_TTL', self.ttl)
+        self.invalidate()
+
+    # =====================================================
+    # COMPILAÇÃO
+    # =====================================================
+
+    @staticmethod
+    def compile(schedules):
+        compiled = {}
+        for s in schedules:
+            compiled.setdefault(s.dia_semana, []).append(
+                (hhmm_to_minutes(s.hora_inicio), hhmm_to_minutes(s.hora_fim), s.id)
+            )
+        return {
+            weekday: (
+                tuple(sorted(entries)),
+                tuple(start for start, _, _ in sorted(entries))
+            )
+            for weekday, entries in compiled.items()
+        }
+
+    def _get(self):
+        compiled = self._compiled
+        if compiled is not None and time.monotonic() < self._expires_at:
+            return compiled
+
+        with self._lock:
+            if self._compiled is None or time.monotonic() >= self._expires_at:
+                rows = db.session.query(
+                    Schedule.id, Schedule.dia_semana, Schedule.hora_inicio, Schedule.hora_fim
+                ).all()
+                self._compiled = self.compile(rows)
+                self._expires_at = time.monotonic() + self.ttl
+            return self._compiled
+
+    def invalidate(self):
+        """Descarta o modelo compilado (recompilado no próximo acesso)."""
+        with self._lock:
+            self._compiled = None
+
+    # =====================================================
+    # CONSULTAS
+    # =====================================================
+
+    def windows(self, weekday):
+        """Janelas (inicio, fim) ordenadas do dia da semana."""
+        entries, _ = self._get().get(weekday, ((), ()))
+        return [(start, end) for start, end, _ in entries]
+
+    def windows_by_weekday(self):
+        return {weekday: self.windows(weekday) for weekday in self._get()}
+
+    def find(self, weekday, minute):
+        """
+        schedule_id do bloco que contém o minuto (busca binária),
+        ou None se o minuto estiver fora de qualquer bloco.
+        """
+        entries, starts = self._get().get(weekday, ((), ()))
+        index = bisect_right(starts, minute) - 1
+        if index >= 0 and entries[index][1] > minute:
+            return entries[index][2]
+        return None
+
+
+schedule_template = ScheduleTemplate()
@@ -0,0 +1,111 @@
+# app/services/user_cache.py
+
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
+
+from app import db
+from app.models.user import User
+
+# Colunas guardadas no cache (senha_hash fica de fora e é carregada sob demanda)
+CACHED_FIELDS = ('id', 'nome', 'email', 'perfil', 'is_active')
+
+
+class UserCache:
+    """
+    Cache LRU (limitado) com TTL dos dados de identidade/perfil usados pelo
+    user_loader do Flask-Login, chave user_id. As rotas que alteram o usuário
+    chamam invalidate(); o TTL limita a defasagem entre processos diferentes.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.maxsize = app.config.get('USER_CACHE_SIZE', self.maxsize)
+        self.ttl = app.config.get('USER_CACHE_TTL', self.ttl)
+        self.clear()
+
+    # =====================================================
+    # LEITURA / ESCRITA
+    # =====================================================
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._data.get(user_id)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[user_id]
+                self.misses += 1
+                return None
+            self._data.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, user_id, fields):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[user_id] = (time.monotonic() + self.ttl, fields)
+            self._data.move_to_end(user_id)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._data.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0
+            }
+
+    # =====================================================
+    # USER LOADER
+    # =====================================================
+
+    def load(self, user_id):
+        """
+        Reconstrói o current_user a partir do cache, sem consultar o banco.
+
+        O objeto é anexado à sessão com merge(load=False): continua sendo
+        uma instância persistente (alterações + commit geram UPDATE) e as
+        colunas fora do cache (ex.: senha_hash) são carregadas sob demanda.
+        """
+        user_id = int(user_id)
+        fields = self.get(user_id)
+        if fields is None:
+            user = db.session.get(User, user_id)
+            if user is not None:
+                self.set(user_id, {name: getattr(user, name) for name in CACHED_FIELDS})
+            return user
+
+        user = db.session.identity_map.get(identity_key(User, user_id))
+        if user is not None:
+            return user
+
+        user = User(**fields)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+
+
+user_cache = UserCache()
@@ -0,0 +1,72 @@
+# app/services/user_service.py
+
+from sqlalchemy import and_, func, or_
+
+from app import db
+from app.models.user import User
+
+
+def normalize_email(email):
+    """E-mails são comparados sem espaços e em minúsculas."""
+    return (email or '').strip().lower()
+
+
+def _prefix_range(column, prefix):
+    """
+    'column começa com prefix' como intervalo [prefix, prefix_seguinte):
+    ao contrário de LIKE, usa o índice de expressão lower(coluna).
+    """
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return and_(column >= prefix, column < upper)
+
+
+class UserService:
+    @staticmethod
+    def find_by_email(email):
+        """Busca por e-mail sem diferenciar maiúsculas (índice lower(email))."""
+        return User.query.filter(func.lower(User.email) == normalize_email(email)).first()
+
+    @staticmethod
+    def search(prefix, limit=10):
+        """Typeahead: usuários cujo nome ou e-mail começa com 'prefix'."""
+        prefix = (prefix or '').strip().lower()
+        if not prefix:
+            return []
+
+        return (
+            db.session.query(User.id, User.nome, User.email, User.perfil)
+            .filter(or_(
+                _prefix_range(func.lower(User.nome), prefix),
+                _prefix_range(func.lower(User.email), prefix)
+            ))
+            .order_by(func.lower(User.nome), User.id)
+            .limit(limit)
+            .all()
+        )
+
+    @staticmethod
+    def list_users(after=None, limit=50, prefix=None):
+        """
+        Página da lista de usuários ordenada por (nome, id) com keyset:
+        'after' é o id do último usuário da página anterior.
+        Retorna (usuarios, id_para_proxima_pagina ou None).
+        """
+        query = User.query
+        prefix = (prefix or '').strip().lower()
+        if prefix:
+            query = query.filter(or_(
+                _prefix_range(func.lower(User.nome), prefix),
+                _prefix_range(func.lower(User.email), prefix)
+            ))
+
+        if after:
+            last = db.session.get(User, after)
+            if last is not None:
+                query = query.filter(or_(
+                    User.nome > last.nome,
+                    and_(User.nome == last.nome, User.id > last.id)
+                ))
+
+        items = query.order_by(User.nome, User.id).limit(limit + 1).all()
+        next_after = items[limit - 1].id if len(items) > limit else None
+        return items[:limit], next_after
@@ -0,0 +1,272 @@
+# app/services/utilization_service.py
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+
+from app import db
+from app.models.booking import Booking
+from app.models.service import Service
+from app.models.utilization import UtilizationPending, UtilizationRollup
+from app.services.availability_engine import ACTIVE_STATUSES, day_bounds, datetime_to_minutes
+from app.services.schedule_template import schedule_template
+
+
+# =============================================================
+# MARCAÇÃO DE DIAS ALTERADOS (eventos de sessão)
+# =============================================================
+# Os dias alterados são marcados na transação da escrita; depois do
+# commit, o rollup desses dias é refeito em uma sessão própria. O
+# relatório só lê 'utilizacao'.
+
+REFRESH_KEY = 'utilization_refresh'
+
+
+def mark_days(session, days):
+    """
+    Marca os dias como pendentes (ou renova a marcação) na transação da
+    sessão e agenda o refresh para depois do commit. Necessário também
+    nas escritas em lote (Core) que não passam pelo flush.
+    """
+    table = UtilizationPending.__table__
+    now = datetime.utcnow()
+    conn = session.connection()
+    dialect = conn.dialect.name
+
+    for day in set(days):
+        if dialect in ('sqlite', 'postgresql'):
+            if dialect == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert
+            stmt = insert(table).values(data=day, marked_at=now)
+            conn.execute(stmt.on_conflict_do_update(
+                index_elements=[table.c.data], set_={'marked_at': now}
+            ))
+        else:
+            result = conn.execute(
+                table.update().where(table.c.data == day).values(marked_at=now)
+            )
+            if result.rowcount == 0:
+                conn.execute(table.insert().values(data=day, marked_at=now))
+    session.info[REFRESH_KEY] = True
+
+
+def _history_days(obj):
+    history = get_history(obj, 'data_agendamento')
+    return {
+        value.date()
+        for value in (*history.deleted, *history.added, *history.unchanged)
+        if value is not None
+    }
+
+
+@event.listens_for(Session, 'after_flush')
+def _mark_changed_days(session, flush_context):
+    days = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Booking):
+            days |= _history_days(obj)
+        elif (isinstance(obj, Service) and obj in session.dirty
+              and get_history(obj, 'duracao').has_changes()):
+            days.update(
+                d.date() for d in session.connection().execute(
+                    select(Booking.data_agendamento).where(Booking.service_id == obj.id)
+                ).scalars()
+            )
+    if days:
+        mark_days(session, days)
+
+
+@event.listens_for(Session, 'after_commit')
+def _refresh_after_commit(session):
+    if not session.info.pop(REFRESH_KEY, False):
+        return
+    try:
+        refresh()
+    except Exception as e:
+        # Os dias continuam pendentes: o próximo refresh (ou a CLI) os refaz
+        current_app.logger.error(f"Erro ao atualizar rollup de utilização: {e}")
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_refresh(session):
+    session.info.pop(REFRESH_KEY, None)
+
+
+# =============================================================
+# ATUALIZAÇÃO DO ROLLUP
+# =============================================================
+
+def _booked_minutes_by_hour(start, duracao):
+    """Divide [start, start+duracao) em minutos por hora do dia (limitado ao dia)."""
+    minute = datetime_to_minutes(start)
+    end = min(minute + duracao, 24 * 60)
+    while minute < end:
+        hour = minute // 60
+        chunk_end = min((hour + 1) * 60, end)
+        yield hour, chunk_end - minute
+        minute = chunk_end
+
+
+def _rebuild_day(session, day):
+    day_start, day_end = day_bounds(day)
+    rows = session.execute(
+        select(Booking.data_agendamento, Booking.service_id, Service.duracao)
+        .join(Service, Booking.service_id == Service.id)
+        .where(
+            Booking.data_agendamento >= day_start,
+            Booking.data_agendamento < day_end,
+            Booking.status.in_(ACTIVE_STATUSES),
+            Booking.deleted_at.is_(None)
+        )
+    ).all()
+
+    minutes = defaultdict(int)
+    for start, service_id, duracao in rows:
+        for hour, value in _booked_minutes_by_hour(start, duracao):
+            minutes[(service_id, hour)] += value
+
+    table = UtilizationRollup.__table__
+    session.execute(table.delete().where(table.c.data == day))
+    if minutes:
+        session.execute(table.insert(), [
+            {'data': day, 'service_id': service_id, 'hora': hour,
+             'dia_semana': day.weekday(), 'minutos': value}
+            for (service_id, hour), value in minutes.items()
+        ])
+
+
+def refresh(full=False):
+    """
+    Recalcula o rollup apenas dos dias marcados como pendentes
+    (ou de todos os dias com agendamentos, se full=True).
+    Retorna a quantidade de dias atualizados.
+
+    Usa uma sessão própria no engine primário (nunca a réplica defasada),
+    de modo que pode rodar após o commit de outra sessão. As marcações
+    são travadas com SKIP LOCKED onde o banco suporta: dois refreshes
+    simultâneos nunca refazem o mesmo dia.
+    """
+    with Session(db.engine) as session:
+        if full:
+            days = session.execute(select(Booking.data_agendamento)).scalars()
+            mark_days(session, {d.date() for d in days})
+            session.info.pop(REFRESH_KEY, None)
+            session.execute(UtilizationRollup.__table__.delete())
+
+        pending = session.execute(
+            select(UtilizationPending.data, UtilizationPending.marked_at)
+            .with_for_update(skip_locked=True)
+        ).all()
+
+        table = UtilizationPending.__table__
+        for day, marked_at in pending:
+            _rebuild_day(session, day)
+            # Só remove a marcação se nenhuma escrita a renovou nesse meio tempo
+            session.execute(
+                table.delete().where(table.c.data == day, table.c.marked_at <= marked_at)
+            )
+        session.commit()
+        return len(pending)
+
+
+def pending_days():
+    """Dias marcados que ainda não entraram no rollup."""
+    return db.session.query(db.func.count(UtilizationPending.data)).scalar()
+
+
+# =============================================================
+# RELATÓRIO
+# =============================================================
+
+def _scheduled_minutes(start_day, end_day):
+    """Minutos de agenda por (dia_semana, hora) no período, pelo modelo semanal."""
+    weekday_count = defaultdict(int)
+    day = start_day
+    while day <= end_day:
+        weekday_count[day.weekday()] += 1
+        day += timedelta(days=1)
+
+    scheduled = defaultdict(int)
+    for weekday, windows in schedule_template.windows_by_weekday().items():
+        for window_start, window_end in windows:
+            minute = window_start
+            while minute < window_end:
+                hour = minute // 60
+                chunk_end = min((hour + 1) * 60, window_end)
+                scheduled[(weekday, hour)] += (chunk_end - minute) * weekday_count[weekday]
+                minute = chunk_end
+    return scheduled
+
+
+def utilization_report(start_day, end_day, service_ids=None):
+    """
+    Ocupação por serviço, dia da semana e hora no período:
+    minutos agendados (rollup) x minutos de agenda (Schedule).
+    Somente leitura: 'pending_days' indica dias ainda fora do rollup.
+    """
+    query = (
+        db.session.query(
+            UtilizationRollup.service_id,
+            UtilizationRollup.dia_semana,
+            UtilizationRollup.hora,
+            db.func.sum(UtilizationRollup.minutos)
+        )
+        .filter(UtilizationRollup.data >= start_day, UtilizationRollup.data <= end_day)
+        .group_by(UtilizationRollup.service_id, UtilizationRollup.dia_semana, UtilizationRollup.hora)
+    )
+    if service_ids:
+        query = query.filter(UtilizationRollup.service_id.in_(service_ids))
+
+    scheduled = _scheduled_minutes(start_day, end_day)
+    names = dict(db.session.query(Service.id, Service.nome).all())
+
+    services = defaultdict(lambda: {'booked_minutes': 0, 'buckets': []})
+    for service_id, weekday, hour, booked in query.all():
+        available = scheduled.get((weekday, hour), 0)
+        entry = services[service_id]
+        entry['booked_minutes'] += booked
+        entry['buckets'].append({
+            'dia_semana': weekday,
+            'hora': hour,
+            'booked_minutes': booked,
+            'scheduled_minutes': available,
+            'utilization': round(booked / available, 4) if available else None
+        })
+
+    total_scheduled = sum(scheduled.values())
+    return {
+        'start': start_day.strftime('%Y-%m-%d'),
+        'end': end_day.strftime('%Y-%m-%d'),
+        'scheduled_minutes': total_scheduled,
+        'pending_days': pending_days(),
+        'services': [
+            {
+                'service_id': service_id,
+                'nome': names.get(service_id),
+                'booked_minutes': entry['booked_minutes'],
+                'utilization': round(entry['booked_minutes'] / total_scheduled, 4) if total_scheduled else None,
+                'buckets': sorted(entry['buckets'], key=lambda b: (b['dia_semana'], b['hora']))
+            }
+            for service_id, entry in sorted(services.items())
+        ]
+    }
+
+
+# =============================================================
+# COMANDO CLI
+# =============================================================
+
+def register_cli_commands(app):
+    import click
+
+    @app.cli.command("refresh-utilization")
+    @click.option('--full', is_flag=True, help='Reconstrói o rollup de todos os dias.')
+    def refresh_utilization(full):
+        """Atualiza o rollup de utilização (dias pendentes ou completo)."""
+        click.echo(f"{refresh(full=full)} dia(s) atualizado(s).")
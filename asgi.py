@@ -0,0 +1,16 @@
+# asgi.py
+"""
+Entrada ASGI para servir a API assíncrona (/api) com um servidor ASGI:
+
+    uvicorn asgi:asgi_app --host 0.0.0.0 --port 8000 --workers 4
+
+O Flask continua sendo WSGI: o WsgiToAsgi (asgiref) executa cada request
+em uma thread do servidor e as views async rodam no event loop dessa
+thread, com as consultas na AsyncSession (app/extensions/async_db.py).
+As rotas síncronas seguem disponíveis pelo mesmo processo.
+"""
+from asgiref.wsgi import WsgiToAsgi
+
+from run import app
+
+asgi_app = WsgiToAsgi(app)
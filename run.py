@@ -1,7 +1,13 @@
 # run.py
+import os
+from dotenv import load_dotenv
+
+load_dotenv()  # antes de importar o app: Config lê as variáveis de ambiente
+
 from app import create_app
+from app.config.config import config_by_name
 
-app = create_app() # APENAS UMA VEZ!
+app = create_app(config_by_name[os.environ.get('APP_CONFIG', 'default')]) # APENAS UMA VEZ!
 
 if __name__ == "__main__":
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True)